@@ -1,14 +1,11 @@
 import os
 import io
+import json
 import tempfile
-from openai import OpenAI
-import asyncio
-import websockets
-import threading
-from flask import Flask, render_template, request, jsonify, send_file
+import time
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context, g
 from dotenv import load_dotenv
 from io import BytesIO
-from fpdf import FPDF
 from datetime import datetime
 
 # ===== Load Environment Variables =====
@@ -20,17 +17,83 @@ TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 # ===== Imports =====
 import main
 from main import agent
-from tools.tts_tool import text_to_speech_live
-from tools.stt_tool import speech_to_text_tool_web
-from tools.ingest_tool import ingest_content
-from tools.content_growth import content_growth_advanced
-from tools.chat_exporter import save_chat_as_pdf
+from tools.tts_tool import text_to_speech_live, text_to_speech_stream, get_audio_cache, TTS_VOICE
+from tools.stt_tool import transcribe_audio_bytes
+from tools.ingest_tool import ingest_content, ingest_urls
+from tools.content_growth import content_growth_advanced, content_growth_batch, CONTENT_GROWTH_BATCH_MAX_IMAGES
+from core.chat_export import (EXPORT_FORMATS, EXPORT_PDF_MAX_EXCHANGES, EXPORT_SYNC_MAX_EXCHANGES, ExportJobs,
+                              export_filename, iter_jsonl, iter_markdown, normalize_exchanges, write_pdf)
+from core.answer_cache import context_fingerprint
+from core.tool_cache import tool_cache_stats
+from core.session_store import SESSION_COOKIE, SESSION_HEADER, is_valid_session_id, new_session_id
+from core.metrics import TRACE_HEADER, end_trace, log, metrics_response, start_trace
+from core.worker_pools import start_pools
+
+# PDF / OCR worker processes are forked now, while the process has no other threads
+start_pools()
 
 # ===== Flask Setup =====
 app = Flask(__name__)
+export_jobs = ExportJobs()
 
-# ===== Temporary Memory for Ingested Content =====
-temporary_context = ""
+
+# ===== Sessions (per-client memory + ingested content) =====
+def current_session():
+    """Resolves the caller's session from the X-Session-ID header or cookie, creating one if needed."""
+    if "session" not in g:
+        session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        if not is_valid_session_id(session_id):
+            session_id = new_session_id()
+        g.session = main.sessions.get(session_id)
+    return g.session
+
+
+@app.after_request
+def set_session_cookie(response):
+    session = g.get("session")
+    if session is not None and request.cookies.get(SESSION_COOKIE) != session.id:
+        response.set_cookie(SESSION_COOKIE, session.id, httponly=True, samesite="Lax")
+    if session is not None:
+        response.headers[SESSION_HEADER] = session.id
+    return response
+
+
+# ===== Request tracing (trace ID + per-stage latency, see core/metrics.py) =====
+@app.before_request
+def begin_trace():
+    g.trace_id, g.trace_tokens = start_trace(request.headers.get(TRACE_HEADER))
+    g.trace_started = time.perf_counter()
+
+
+@app.after_request
+def set_trace_header(response):
+    if "trace_id" in g:
+        response.headers[TRACE_HEADER] = g.trace_id
+        g.trace_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def finish_trace(error=None):
+    # Streamed responses are logged once their headers are sent
+    if "trace_started" not in g:
+        return
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    end_trace(g.pop("trace_tokens"), request.method, rule, g.get("trace_status", 500),
+              time.perf_counter() - g.pop("trace_started"))
+
+
+def _set_context(session, new_context: str):
+    """Replaces the session's ingested content and drops cached answers for the old and new content."""
+    main.answer_cache.invalidate(context_fingerprint(session.context))
+    main.answer_cache.invalidate(context_fingerprint(new_context))
+    session.context = new_context
+    main.sessions.touch(session)
+
+
+def _summary_snippet(full_message: str) -> str:
+    """The summary part of an ingest_content() message (falls back to its start)."""
+    return full_message.split("📝 Summary:")[-1].strip() if "📝 Summary:" in full_message else full_message[:200]
 
 # =========================================================
 # 🏠 HOME PAGE
@@ -46,7 +109,6 @@ def index():
 
 @app.route('/agent_query', methods=['POST'])
 def agent_query():
-    global temporary_context
     data = request.get_json()
     user_text = data.get("text", "").strip()
 
@@ -58,38 +120,18 @@ def agent_query():
         })
 
     try:
-        # Build context-aware prompt that forces the agent to use the ingested content
-        if temporary_context:
-            prompt = (
-                f"You have access to the following ingested document or web content:\n\n"
-                f"{temporary_context[:4000]}\n\n"
-                f"Answer the user's question **using only this content**.\n"
-                f"Do NOT call web search, speech-to-text, or any other tools.\n\n"
-                f"User question: {user_text}"
-            )
-        else:
-            prompt = (
-                f"{user_text}\n\n"
-                f"IMPORTANT: There is no ingested content available. Answer based on general knowledge only.\n"
-                f"Do NOT call web search, speech-to-text, or any other tools."
-            )
-
-        # Log prompt (first 500 chars)
-        print("🧩 Prompt sent to agent:\n", prompt[:500])
-
-        # Call the working agent
-        response = main.run_text_agent(prompt)
+        # Answer with the ingested content (served from the answer cache when possible)
+        answer = main.answer_question(user_text, session=current_session())
 
         return jsonify({
             "status": "success",
-            "result": response,
+            "result": answer["result"],
+            "meta": answer["meta"],
             "icon": "✅"
         })
 
     except Exception as e:
-        print("❌ ERROR in /agent_query:", e)
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ ERROR in /agent_query: %s", e)
         return jsonify({
             "status": "error",
             "result": f"⚠️ Something went wrong while processing your message: {str(e)}",
@@ -97,15 +139,75 @@ def agent_query():
         })
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/agent_query_stream', methods=['POST'])
+def agent_query_stream():
+    """Same as /agent_query, but streams Server-Sent Events: status, token, done."""
+    data = request.get_json(silent=True) or {}
+    user_text = data.get("text", "").strip()
+
+    if not user_text:
+        return jsonify({
+            "status": "error",
+            "result": "❌ Empty message.",
+            "icon": "❌"
+        }), 400
+
+    session = current_session()
+
+    def generate():
+        try:
+            for event, payload in main.stream_answer(user_text, session=session):
+                yield _sse(event, payload)
+        except Exception as e:
+            log.exception("❌ ERROR in /agent_query_stream: %s", e)
+            yield _sse("error", {"result": f"⚠️ Something went wrong while processing your message: {str(e)}"})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# =========================================================
+# 📊 CACHE STATISTICS
+# =========================================================
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        "answers": main.answer_cache.stats(),
+        "tools": tool_cache_stats(),
+        "sessions": main.sessions.stats(),
+        "audio": get_audio_cache().stats(),
+    })
+
+
+@app.route('/intent_stats', methods=['GET'])
+def intent_stats():
+    """Local intent classifier: messages seen, share answered without the LLM, latency."""
+    return jsonify(main.intents.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape: per-stage latency histograms, stage failures and request latency."""
+    body, content_type = metrics_response()
+    return Response(body, content_type=content_type)
+
+
 # =========================================================
 # 🧩 CONTENT INGESTION (PDF / URL)
 # =========================================================
 
 @app.route('/ingest', methods=['POST'])
 def ingest():
-    global temporary_context
     url = request.form.get('url')
     pdf_file = request.files.get('pdf_file')
+    session = current_session()
 
     if not url and not pdf_file:
         return jsonify({
@@ -116,33 +218,28 @@ def ingest():
 
     try:
         if url:
-            full_message = ingest_content(url, state=None)
-            summary_snippet = full_message.split("📝 Summary:")[-1].strip() if "📝 Summary:" in full_message else full_message[:200]
-            temporary_context = summary_snippet
+            full_message = ingest_content(url, state=None, owner=session.id)
+            _set_context(session, _summary_snippet(full_message))
             message = "✅ URL successfully ingested!"
         else:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                pdf_file.save(tmp.name)
-                tmp_path = tmp.name
-            full_message = ingest_content(tmp_path, state=None)
-            summary_snippet = full_message.split("📝 Summary:")[-1].strip() if "📝 Summary:" in full_message else full_message[:200]
-            temporary_context = summary_snippet
+            # Read straight from the upload stream, no temp copy
+            full_message = ingest_content(pdf_file, state=None, owner=session.id)
+            _set_context(session, _summary_snippet(full_message))
             message = "✅ PDF successfully ingested!"
+        main.uploads_changed(session)
 
-        print("✅ TEMP MEMORY UPDATED with summary snippet.")
-        print("Preview:", temporary_context[:300])
+        log.info("✅ TEMP MEMORY UPDATED with summary snippet.")
+        log.info("Preview: %s", session.context[:300])
 
         return jsonify({
             "status": "success",
             "message": message,               # still used by UI for green check
-            "summary_snippet": temporary_context,  # new field for the short summary
+            "summary_snippet": session.context,  # new field for the short summary
             "icon": "✅"
         })
 
     except Exception as e:
-        print("❌ ERROR in /ingest:", e)
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ ERROR in /ingest: %s", e)
         return jsonify({
             "status": "error",
             "message": f"Failed to ingest content: {str(e)}",
@@ -152,6 +249,50 @@ def ingest():
 
 
 
+# =========================================================
+# 📚 BULK URL INGESTION
+# =========================================================
+@app.route('/ingest_batch', methods=['POST'])
+def ingest_batch():
+    """Ingests many URLs concurrently and streams one NDJSON line per URL as it finishes."""
+    data = request.get_json(silent=True) or {}
+    urls = data.get("urls") or request.form.get("urls", "")
+    summarize = bool(data.get("summarize", False))
+
+    # A string is a whitespace-separated list; anything else must be a list of strings
+    if isinstance(urls, str):
+        urls = urls.split()
+    elif not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return jsonify({
+            "status": "error",
+            "message": "❌ \"urls\" must be a list of strings",
+            "icon": "❌"
+        }), 400
+
+    if not urls:
+        return jsonify({
+            "status": "error",
+            "message": "❌ No URLs provided",
+            "icon": "❌"
+        }), 400
+
+    session = current_session()
+
+    def generate():
+        counts = {}
+        for result in ingest_urls(urls, summarize=summarize, owner=session.id):
+            if result["status"] == "ingested":
+                # New or changed content: drop answers built on the old version
+                main.uploads_changed(session)
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"status": "done", "counts": counts}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+
+
 # This is working too, better than the one below, but still two displays
 
 # @app.route('/ingest', methods=['POST'])
@@ -331,8 +472,9 @@ def ingest():
 # =========================================================
 @app.route('/clear-ingested', methods=['POST'])
 def clear_ingested():
-    global temporary_context
-    temporary_context = ""
+    session = current_session()
+    _set_context(session, "")
+    main.clear_uploads(session)
     return jsonify({
         "status": "success",
         "message": "✅ Temporary ingestion memory cleared.",
@@ -364,6 +506,34 @@ def tts():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/tts_stream', methods=['GET', 'POST'])
+def tts_stream():
+    """Streams MP3 as it is synthesised, sentence by sentence; GET ?text= works as an <audio> src."""
+    data = request.get_json(silent=True) or request.values
+    text = (data.get("text") or "").strip()
+    voice = data.get("voice") or TTS_VOICE
+    if not text:
+        return jsonify({"error": "No text provided"}), 400
+
+    audio = text_to_speech_stream(text, voice=voice)
+    try:
+        # Pull the first chunk here so provider errors still get a proper status code
+        first = next(audio)
+    except StopIteration:
+        first = b""
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        yield first
+        try:
+            yield from audio
+        except Exception as e:
+            log.error("❌ TTS stream error: %s", e)
+
+    return Response(stream_with_context(generate()), mimetype="audio/mpeg")
+
+
 # =========================================================
 # 🎙️ SPEECH TO TEXT (MICROPHONE) ------- handles complete audio files, used when you stop recording and send everything at once.
 # =========================================================
@@ -375,26 +545,12 @@ def transcribe_audio():
             return jsonify({"error": "No audio file provided"}), 400
 
         audio_file = request.files["audio"]
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-            audio_file.save(tmp.name)
-            tmp_path = tmp.name
-
-        from openai import OpenAI
-        client = OpenAI()
-
-        with open(tmp_path, "rb") as f:
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=f
-            )
-
-        text = transcription.text.strip()
-        print(f"📝 Whisper transcription (browser mic): {text}")
+        text = transcribe_audio_bytes(audio_file.read(), audio_file.filename or "input.wav")
+        log.info("📝 Whisper transcription (browser mic): %s", text)
         return jsonify({"text": text})
 
     except Exception as e:
-        print("❌ ERROR in /transcribe_audio:", e)
+        log.error("❌ ERROR in /transcribe_audio: %s", e)
         return jsonify({"error": str(e)}), 500
     
 
@@ -425,9 +581,34 @@ def content_growth():
         )
         return jsonify(result)
     except Exception as e:
-        print("❌ Content Growth Error:", e)
+        log.error("❌ Content Growth Error: %s", e)
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/content_growth_batch', methods=['POST'])
+def content_growth_batch_route():
+    """OCRs many screenshots on a worker pool; streams one NDJSON line per image, then the batch summary."""
+    files = request.files.getlist("screenshots")
+    captions = request.form.getlist("captions")
+
+    if not files:
+        return jsonify({"error": "❌ No screenshots provided"}), 400
+    if len(files) > CONTENT_GROWTH_BATCH_MAX_IMAGES:
+        return jsonify({"error": f"❌ At most {CONTENT_GROWTH_BATCH_MAX_IMAGES} screenshots per batch"}), 400
+
+    # Read the uploads now; the generator runs after the request body is consumed
+    screenshots = [(f.filename or f"image-{i + 1}", f.read()) for i, f in enumerate(files)]
+
+    def generate():
+        try:
+            for result in content_growth_batch(screenshots, captions=captions):
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            log.error("❌ Content Growth Batch Error: %s", e)
+            yield json.dumps({"status": "error", "error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
     
 
 # @app.route('/content_growth', methods=['POST'])
@@ -467,46 +648,87 @@ def content_growth():
 # from io import BytesIO
 # from datetime import datetime
 
-from fpdf import FPDF
-from io import BytesIO
-from flask import send_file, request, jsonify
-from datetime import datetime
-
-@app.route('/export_chat', methods=['POST'])
+@app.route('/export_chat', methods=['GET', 'POST'])
 def export_chat():
+    """
+    Exports this session's conversation as ?format=pdf (default), md or jsonl.
+    Markdown/JSONL stream as they are rendered; PDFs of more than
+    EXPORT_SYNC_MAX_EXCHANGES exchanges (or with ?background=1) become a
+    background job: 202 with a job to poll at /export_jobs/<id>. PDFs are
+    refused (413) past EXPORT_PDF_MAX_EXCHANGES, since they are built in memory.
+    """
     try:
-        chat_history = request.json.get("chat_history", [])
-        if not chat_history:
+        data = request.get_json(silent=True) or {}
+        fmt = (request.args.get("format") or data.get("format") or "pdf").lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"status": "error", "message": f"❌ Unknown format: {fmt}", "icon": "❌"}), 400
+
+        session = current_session()
+        # The browser's own copy is only a fallback for sessions that predate the server transcript
+        exchanges = list(session.transcript) or normalize_exchanges(data.get("chat_history"))
+        if not exchanges:
             return jsonify({"status":"error","message":"❌ No chat history","icon":"❌"}), 400
 
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, "Chat History", ln=True, align="C")
-
-        for i, pair in enumerate(chat_history, 1):
-            user_msg, agent_msg = pair
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 8, f"--- Exchange {i} ---", ln=True)
-            pdf.set_font("Arial", "", 10)
-            # Replace unsupported characters
-            user_msg = user_msg.encode('latin-1', 'replace').decode('latin-1')
-            agent_msg = agent_msg.encode('latin-1', 'replace').decode('latin-1')
-            pdf.multi_cell(0, 5, f"User: {user_msg}\n\nAgent: {agent_msg}\n\n")
-
-        buf = BytesIO()
-        pdf.output(buf)
-        buf.seek(0)
-
-        fname = f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        return send_file(buf, as_attachment=True, download_name=fname, mimetype="application/pdf")
+        mimetype = EXPORT_FORMATS[fmt][0]
+        fname = export_filename(fmt)
+        if fmt == "pdf" and len(exchanges) > EXPORT_PDF_MAX_EXCHANGES:
+            return jsonify({
+                "status": "error",
+                "message": f"❌ PDF exports are limited to {EXPORT_PDF_MAX_EXCHANGES} exchanges; use md or jsonl",
+                "icon": "❌"
+            }), 413
+        background = str(request.args.get("background", data.get("background", ""))).lower() in ("1", "true")
+        if fmt == "pdf" and (background or len(exchanges) > EXPORT_SYNC_MAX_EXCHANGES):
+            job = export_jobs.submit(session.id, exchanges, fmt)
+            return jsonify({"status": "accepted", "job": job, "icon": "⏳"}), 202
+
+        if fmt == "pdf":
+            # Served from disk in chunks. The directory goes right away: on POSIX
+            # the open handle keeps the file readable until the response closes it
+            with tempfile.TemporaryDirectory(prefix="export-", ignore_cleanup_errors=True) as tmp_dir:
+                pdf_file = open(write_pdf(exchanges, os.path.join(tmp_dir, fname)), "rb")
+            return send_file(pdf_file, as_attachment=True, download_name=fname, mimetype=mimetype)
+
+        chunks = iter_markdown(exchanges) if fmt == "md" else iter_jsonl(exchanges)
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="{fname}"'},
+        )
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ ERROR in /export_chat: %s", e)
         return jsonify({"status":"error","message":f"Failed to export: {str(e)}","icon":"❌"}), 500
 
 
+@app.route('/export_jobs/<job_id>', methods=['GET'])
+def export_job_status(job_id):
+    job = export_jobs.get(job_id, current_session().id)
+    if job is None:
+        return jsonify({"status": "error", "message": "❌ Unknown export job", "icon": "❌"}), 404
+    return jsonify({"status": "success", "job": ExportJobs.describe(job)})
+
+
+@app.route('/export_jobs/<job_id>/download', methods=['GET'])
+def export_job_download(job_id):
+    job = export_jobs.get(job_id, current_session().id)
+    if job is None:
+        return jsonify({"status": "error", "message": "❌ Unknown export job", "icon": "❌"}), 404
+    if job["status"] != "ready":
+        return jsonify({"status": "error", "message": f"❌ Export is {job['status']}", "icon": "❌"}), 409
+    # Served from disk in chunks rather than loaded into memory
+    return send_file(job["path"], as_attachment=True, download_name=job["filename"],
+                     mimetype=EXPORT_FORMATS[job["format"]][0])
+
+
+@app.route('/clear_chat', methods=['POST'])
+def clear_chat():
+    """Empties the session transcript that exports are rendered from."""
+    session = current_session()
+    session.transcript = []
+    main.sessions.touch(session)
+    return jsonify({"status": "success", "icon": "✅"})
+
 
     
 # =========================================================
@@ -0,0 +1,200 @@
+import io
+import os
+import json
+import time
+import asyncio
+
+from fastapi import FastAPI, Request, UploadFile, File, Form
+from fastapi.responses import JSONResponse, Response
+from fastapi.middleware.wsgi import WSGIMiddleware
+
+# ===== Imports =====
+# app.py loads the environment, the shared pipeline (via main) and the Flask routes
+import main
+from app import app as flask_app, _set_context, _summary_snippet
+from tools.tts_tool import atext_to_speech_live
+from tools.stt_tool import aspeech_to_text_web
+from tools.ingest_tool import ingest_content
+from tools.content_growth import acontent_growth_advanced
+from core.session_store import SESSION_COOKIE, SESSION_HEADER, is_valid_session_id, new_session_id
+from core.metrics import TRACE_HEADER, end_trace, log, start_trace
+
+# =========================================================
+# ⚡ ASYNC SERVING MODE
+# =========================================================
+# Run with:  uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+# The slow provider-bound routes below are native coroutines: while one waits
+# on OpenAI / Tavily / SerpAPI / Whisper / TTS the event loop serves others.
+# Everything else (index page, static files, exports, batch ingest) is served
+# by the unchanged Flask app mounted underneath.
+
+app = FastAPI(title="AI Content Coach")
+
+
+# ===== Sessions (shared with the Flask routes) =====
+def current_session(request: Request):
+    if not hasattr(request.state, "session"):
+        session_id = request.headers.get(SESSION_HEADER) or request.cookies.get(SESSION_COOKIE)
+        if not is_valid_session_id(session_id):
+            session_id = new_session_id()
+        request.state.session = main.sessions.get(session_id)
+    return request.state.session
+
+
+@app.middleware("http")
+async def set_session_cookie(request: Request, call_next):
+    response = await call_next(request)
+    session = getattr(request.state, "session", None)
+    if session is not None:
+        if request.cookies.get(SESSION_COOKIE) != session.id:
+            response.set_cookie(SESSION_COOKIE, session.id, httponly=True, samesite="lax")
+        response.headers[SESSION_HEADER] = session.id
+    return response
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Trace ID + request latency; routes served by the mounted Flask app share this trace."""
+    trace_id, tokens = start_trace(request.headers.get(TRACE_HEADER))
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers[TRACE_HEADER] = trace_id
+        return response
+    finally:
+        route = request.scope.get("route")
+        end_trace(tokens, request.method, getattr(route, "path", "") or "flask", status, time.perf_counter() - started)
+
+
+# =========================================================
+# 🤖 MAIN AGENT QUERY
+# =========================================================
+@app.post("/agent_query")
+async def agent_query(request: Request):
+    try:
+        data = await request.json()
+    except json.JSONDecodeError:
+        data = {}
+    user_text = (data.get("text") or "").strip()
+
+    if not user_text:
+        return {"status": "error", "result": "❌ Empty message.", "icon": "❌"}
+
+    try:
+        answer = await main.aanswer_question(user_text, session=current_session(request))
+        return {"status": "success", "result": answer["result"], "meta": answer["meta"], "icon": "✅"}
+    except Exception as e:
+        log.error("❌ ERROR in /agent_query: %s", e)
+        return {
+            "status": "error",
+            "result": f"⚠️ Something went wrong while processing your message: {str(e)}",
+            "icon": "❌"
+        }
+
+
+# =========================================================
+# 🧩 CONTENT INGESTION (PDF / URL)
+# =========================================================
+@app.post("/ingest")
+async def ingest(request: Request, url: str = Form(None), pdf_file: UploadFile = File(None)):
+    session = current_session(request)
+
+    if not url and not pdf_file:
+        return JSONResponse({"status": "error", "message": "❌ No URL or PDF provided", "icon": "❌"}, status_code=400)
+
+    try:
+        # Extraction, chunking and upserts are blocking work; keep them off the event loop
+        if url:
+            full_message = await asyncio.to_thread(ingest_content, url, state=None, owner=session.id)
+            message = "✅ URL successfully ingested!"
+        else:
+            upload = io.BytesIO(await pdf_file.read())
+            upload.name = pdf_file.filename
+            full_message = await asyncio.to_thread(ingest_content, upload, state=None, owner=session.id)
+            message = "✅ PDF successfully ingested!"
+        _set_context(session, _summary_snippet(full_message))
+        main.uploads_changed(session)
+
+        return {"status": "success", "message": message, "summary_snippet": session.context, "icon": "✅"}
+
+    except Exception as e:
+        log.error("❌ ERROR in /ingest: %s", e)
+        return JSONResponse(
+            {"status": "error", "message": f"Failed to ingest content: {str(e)}", "icon": "❌"},
+            status_code=500,
+        )
+
+
+# =========================================================
+# 🔊 TEXT TO SPEECH
+# =========================================================
+@app.post("/tts")
+async def tts(request: Request):
+    data = await request.json()
+    text = (data.get("text") or "").strip()
+    if not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+
+    try:
+        audio_data = await atext_to_speech_live(text)
+        return Response(audio_data, media_type="audio/mpeg")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# =========================================================
+# 🎙️ SPEECH TO TEXT (MICROPHONE)
+# =========================================================
+@app.post("/transcribe_audio")
+async def transcribe_audio(audio: UploadFile = File(None)):
+    if audio is None:
+        return JSONResponse({"error": "No audio file provided"}, status_code=400)
+
+    try:
+        text = (await aspeech_to_text_web(await audio.read(), audio.filename or "input.wav")).strip()
+        log.info("📝 Whisper transcription (browser mic): %s", text)
+        return {"text": text}
+    except Exception as e:
+        log.error("❌ ERROR in /transcribe_audio: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# =========================================================
+# 📈 CONTENT GROWTH ANALYSIS
+# =========================================================
+@app.post("/content_growth")
+async def content_growth(post_url: str = Form(None), caption: str = Form(""), metrics: str = Form(None),
+                         screenshot: UploadFile = File(None)):
+    parsed_metrics = None
+    if metrics:
+        try:
+            parsed_metrics = json.loads(metrics)
+        except json.JSONDecodeError:
+            return JSONResponse({"error": "Invalid JSON in metrics"}, status_code=400)
+
+    try:
+        image = io.BytesIO(await screenshot.read()) if screenshot else None
+        return await acontent_growth_advanced(
+            post_url=post_url,
+            screenshot=image,
+            metrics=parsed_metrics,
+            caption=caption
+        )
+    except Exception as e:
+        log.error("❌ Content Growth Error: %s", e)
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# ===== Everything else: the Flask app =====
+app.mount("/", WSGIMiddleware(flask_app))
+
+
+# =========================================================
+# 🚀 RUN SERVER
+# =========================================================
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("asgi_app:app", host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,129 @@
+"""
+Benchmark: HTML text extraction, legacy (BeautifulSoup html.parser, all <p>)
+vs the fast lxml main-content engine.
+
+Point --corpus at a folder of saved pages (*.html). If a page has a sibling
+<name>.txt with the expected article text, token precision/recall/F1 against
+it are reported; otherwise the share of extracted text that is link text
+(navigation, menus, related links) is used as a boilerplate proxy.
+Without --corpus a synthetic corpus of blog-like pages is generated.
+
+    python -m benchmarks.bench_html_extract --corpus path/to/pages [--repeat 5]
+"""
+import os
+import re
+import glob
+import time
+import random
+import argparse
+
+from bs4 import BeautifulSoup
+
+from core.html_extract import extract_legacy, extract_text
+
+WORD = re.compile(r"\w+")
+WORDS = ("creator audience growth video hook retention caption thumbnail analytics "
+         "posting schedule engagement algorithm community brand story niche").split()
+
+
+def synthetic_page(rng: random.Random, paragraphs: int) -> tuple:
+    body = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90))).capitalize() + "."
+            for _ in range(paragraphs)]
+    nav = "".join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(30))
+    related = "".join(f'<p><a href="/p/{i}">Related post {i} you might like</a></p>' for i in range(12))
+    html = (
+        "<html><head><title>Post</title><script>var x = 1;</script><style>p{}</style></head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        "<div class='cookie-banner'><p>We use cookies to improve your experience on this website.</p></div>"
+        "<div id='content'><h1>How to grow</h1>"
+        + "".join(f"<p>{text}</p>" for text in body)
+        + f"</div><div class='related-posts'>{related}</div>"
+        "<footer><p>© 2025 Example Media. All rights reserved. Terms · Privacy · Contact</p></footer>"
+        "</body></html>"
+    )
+    return html.encode("utf-8"), "\n".join(["How to grow"] + body)
+
+
+def load_corpus(path: str):
+    pages = []
+    for html_path in sorted(glob.glob(os.path.join(path, "*.html")) + glob.glob(os.path.join(path, "*.htm"))):
+        with open(html_path, "rb") as f:
+            html = f.read()
+        gold = None
+        txt_path = os.path.splitext(html_path)[0] + ".txt"
+        if os.path.exists(txt_path):
+            with open(txt_path, encoding="utf-8") as f:
+                gold = f.read()
+        pages.append((os.path.basename(html_path), html, gold))
+    return pages
+
+
+def tokens(text: str):
+    return WORD.findall(text.lower())
+
+
+def f1(extracted: str, gold: str):
+    from collections import Counter
+
+    got, want = Counter(tokens(extracted)), Counter(tokens(gold))
+    overlap = sum((got & want).values())
+    precision = overlap / max(sum(got.values()), 1)
+    recall = overlap / max(sum(want.values()), 1)
+    score = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, score
+
+
+def link_text_share(html: bytes, extracted: str) -> float:
+    soup = BeautifulSoup(html, "lxml")
+    link_words = set()
+    for a in soup.find_all("a"):
+        link_words.update(tokens(a.get_text()))
+    words = tokens(extracted)
+    return sum(1 for w in words if w in link_words) / max(len(words), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="folder of saved *.html pages (optional .txt gold text)")
+    parser.add_argument("--synthetic", type=int, default=50, help="synthetic pages when no corpus is given")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(7)
+        pages = []
+        for i in range(args.synthetic):
+            html, gold = synthetic_page(rng, rng.randint(5, 60))
+            pages.append((f"synthetic-{i}.html", html, gold))
+    if not pages:
+        raise SystemExit("No pages found.")
+
+    total_bytes = sum(len(html) for _, html, _ in pages)
+    engines = {"legacy": extract_legacy, "fast": lambda html: extract_text(html, engine="fast")}
+
+    print(f"{len(pages)} pages, {total_bytes / 1e6:.2f} MB")
+    print(f"{'engine':<8} {'pages/s':>9} {'MB/s':>7} {'avg chars':>10} {'precision':>10} {'recall':>7} {'F1':>6} {'link share':>11}")
+    for name, engine in engines.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            outputs = [engine(html) for _, html, _ in pages]
+        elapsed = (time.perf_counter() - start) / args.repeat
+
+        scored = [f1(out, gold) for out, (_, _, gold) in zip(outputs, pages) if gold]
+        if scored:
+            precision = sum(s[0] for s in scored) / len(scored)
+            recall = sum(s[1] for s in scored) / len(scored)
+            score = sum(s[2] for s in scored) / len(scored)
+            quality = f"{precision:>10.3f} {recall:>7.3f} {score:>6.3f}"
+        else:
+            quality = f"{'-':>10} {'-':>7} {'-':>6}"
+        share = sum(link_text_share(html, out) for out, (_, html, _) in zip(outputs, pages)) / len(pages)
+        avg_chars = sum(len(out) for out in outputs) / len(outputs)
+        print(f"{name:<8} {len(pages) / elapsed:>9.1f} {total_bytes / elapsed / 1e6:>7.2f} "
+              f"{avg_chars:>10.0f} {quality} {share:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: module import time, measured with `python -X importtime` in a fresh
+interpreter per module so results are not skewed by already-imported packages.
+
+    python -m benchmarks.bench_import_time [--modules tools tools.ingest_tool ...]
+                                          [--top 10] [--max-ms 1500]
+
+With --max-ms the script exits non-zero when any module exceeds the budget,
+so it can gate startup regressions in CI.
+"""
+import sys
+import argparse
+import subprocess
+
+DEFAULT_MODULES = [
+    "tools",
+    "tools.ingest_tool",
+    "tools.content_growth",
+    "tools.tts_tool",
+    "tools.stt_tool",
+    "core.agent_controller",
+]
+
+
+def measure(module: str):
+    """Returns (cumulative_us, [(cumulative_us, self_us, name), ...]) for one import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    total = next((row[0] for row in reversed(rows) if row[2].strip() == module), 0)
+    return total, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10, help="slowest dependencies to list per module")
+    parser.add_argument("--max-ms", type=float, help="fail if any module takes longer than this")
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        try:
+            total, rows = measure(module)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            over_budget.append(module)
+            continue
+        print(f"\n{module}: {total / 1000:.1f} ms")
+        slowest = sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]
+        for cumulative_us, self_us, name in slowest:
+            print(f"    self {self_us / 1000:>8.1f} ms  cumulative {cumulative_us / 1000:>8.1f} ms  {name.strip()}")
+        if args.max_ms is not None and total / 1000 > args.max_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"\n⚠️ Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,98 @@
-import traceback
+import json
+import queue
+import re
+import threading
 from langchain.agents import initialize_agent, AgentType
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import get_buffer_string
 from tools import ALL_TOOLS
+from core.chunking import count_tokens
+from core.context_assembler import assemble_context
+from core.metrics import in_context, log, timed
+from core.rag_pipeline import RAG_PROMPT
+
+
+class FinalAnswerExtractor:
+    """
+    Pulls the text of `"action_input"` out of a streamed
+    {"action": "Final Answer", "action_input": "..."} blob as tokens arrive,
+    decoding JSON escapes. Tool-call blobs produce nothing.
+    """
+
+    _ACTION = re.compile(r'"action"\s*:\s*"Final Answer"')
+    _INPUT = re.compile(r'"action_input"\s*:\s*"')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._buffer = ""
+        self._pos = None  # index of the next undecoded answer character
+        self._done = False
+
+    def feed(self, token: str) -> str:
+        if self._done:
+            return ""
+        self._buffer += token
+        if self._pos is None:
+            action = self._ACTION.search(self._buffer)
+            answer = self._INPUT.search(self._buffer)
+            if not action or not answer:
+                return ""
+            self._pos = answer.end()
+
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self._done = True
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            # Escapes may be split across tokens; wait for the rest
+            end = pos + (6 if buffer[pos + 1:pos + 2] == "u" else 2)
+            if end > len(buffer):
+                break
+            try:
+                out.append(json.loads(f'"{buffer[pos:end]}"'))
+            except ValueError:
+                out.append(buffer[pos:end])
+            pos = end
+        self._pos = pos
+        return "".join(out)
+
+
+class StreamingHandler(BaseCallbackHandler):
+    """Forwards final-answer tokens and tool start/end events to `emit(event, data)`."""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.extractor = FinalAnswerExtractor()
+
+    def on_llm_new_token(self, token: str, **kwargs):
+        text = self.extractor.feed(token)
+        if text:
+            self.emit("token", {"text": text})
+
+    def on_llm_end(self, response, **kwargs):
+        self.extractor.reset()
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        self.emit("status", {"tool": (serialized or {}).get("name", "tool"), "state": "start"})
+
+    def on_tool_end(self, output, **kwargs):
+        self.emit("status", {"tool": kwargs.get("name") or "tool", "state": "end"})
+
 
 class AgentController:
-    def __init__(self, llm, memory):
+    def __init__(self, llm, memory, retriever=None):
+        self.llm = llm
+        self.retriever = retriever
+        # This session's own ingested content (see main.uploads_changed)
+        self.uploads_retriever = None
         self.agent = initialize_agent(
             tools=ALL_TOOLS,
             llm=llm,
@@ -12,36 +101,205 @@ class AgentController:
             verbose=True,
             handle_parsing_errors=True
         )
+        self._template_tokens = None
 
     @property
     def memory(self):
         """Exposes agent memory."""
         return self.agent.memory
-    
-    def invoke(self, query: str, context: str = None) -> str:
+
+    def has_history(self) -> bool:
+        """True once the memory holds a turn (verbatim or summarised), i.e. answers may depend on it."""
+        return bool(self.memory.chat_memory.messages or getattr(self.memory, "summary", ""))
+
+    def overhead_tokens(self) -> int:
+        """Tokens the agent adds around each input: its prompt (with tool descriptions) plus chat memory."""
+        if self._template_tokens is None:
+            prompt = self.agent.agent.llm_chain.prompt
+            self._template_tokens = sum(
+                count_tokens(getattr(getattr(message, "prompt", None), "template", "") or "")
+                for message in getattr(prompt, "messages", [])
+            )
+        history = self.memory.load_memory_variables({}).get(self.memory.memory_key, [])
+        if isinstance(history, str):
+            return self._template_tokens + count_tokens(history)
+        return self._template_tokens + sum(count_tokens(str(message.content)) for message in history)
+
+    def _history(self) -> str:
+        history = self.memory.load_memory_variables({}).get(self.memory.memory_key, [])
+        return history if isinstance(history, str) else get_buffer_string(history)
+
+    def _direct_prompt(self, query: str, context: str, documents) -> str:
+        history = self._history()
+        if documents:
+            # Ingested summary first, then the retrieved passages (the session's uploads included)
+            context = "\n\n".join([context or ""] + [doc.page_content for doc in documents]).strip()
+        reserved = count_tokens(RAG_PROMPT.template) + count_tokens(history)
+        context = assemble_context(query, context, reserved_tokens=reserved) if context else ""
+        return RAG_PROMPT.format(
+            chat_history=history or "(none)",
+            context=context or "(no relevant context found)",
+            question=query,
+        )
+
+    def _retrievers(self, context: str):
+        # Ingested content takes the place of the knowledge base, as on the agent route,
+        # but the session's uploads (the full text behind that summary) are always searched
+        retrievers = [self.uploads_retriever] if context else [self.retriever, self.uploads_retriever]
+        return [retriever for retriever in retrievers if retriever is not None]
+
+    def _retrieve(self, query: str, context: str):
+        documents = []
+        for retriever in self._retrievers(context):
+            try:
+                with timed("retrieval"):
+                    documents.extend(retriever.invoke(query))
+            except Exception as e:
+                log.warning("⚠️ Retrieval failed, answering without the knowledge base: %s", e)
+        return documents
+
+    async def _aretrieve(self, query: str, context: str):
+        documents = []
+        for retriever in self._retrievers(context):
+            try:
+                with timed("retrieval"):
+                    documents.extend(await retriever.ainvoke(query))
+            except Exception as e:
+                log.warning("⚠️ Retrieval failed, answering without the knowledge base: %s", e)
+        return documents
+
+    def _remember_direct(self, query: str, answer: str):
+        self.memory.save_context({"input": query}, {"output": answer})
+
+    def answer_direct(self, query: str, context: str = None, callbacks=None) -> str:
+        """
+        Direct route: one retrieval (only of the session's uploads when content
+        is ingested) and one LLM call with the RAG prompt and chat memory, no
+        ReAct loop or tools.
+        """
+        try:
+            prompt = self._direct_prompt(query, context, self._retrieve(query, context))
+            config = {"callbacks": callbacks} if callbacks else None
+            answer = self.llm.invoke(prompt, config=config).content
+            self._remember_direct(query, answer)
+            return answer
+
+        except Exception as e:
+            log.exception("❌ Error during direct answer: %s", e)
+            return "❌ Something went wrong while processing your message."
+
+    async def aanswer_direct(self, query: str, context: str = None, callbacks=None) -> str:
+        """Async answer_direct for the ASGI app."""
+        try:
+            prompt = self._direct_prompt(query, context, await self._aretrieve(query, context))
+            config = {"callbacks": callbacks} if callbacks else None
+            answer = (await self.llm.ainvoke(prompt, config=config)).content
+            self._remember_direct(query, answer)
+            return answer
+
+        except Exception as e:
+            log.exception("❌ Error during direct answer: %s", e)
+            return "❌ Something went wrong while processing your message."
+
+    def stream_direct(self, query: str, context: str = None, callbacks=None):
+        """
+        answer_direct as (event, data) pairs: ("token", {"text"}) per chunk, then
+        ("done", {"result"}). If generation fails, "done" also carries
+        "error": True and the result is whatever was streamed plus an error note;
+        nothing is added to memory then.
+        """
+        parts = []
+        try:
+            prompt = self._direct_prompt(query, context, self._retrieve(query, context))
+            config = {"callbacks": callbacks} if callbacks else None
+            for chunk in self.llm.stream(prompt, config=config):
+                if chunk.content:
+                    parts.append(chunk.content)
+                    yield "token", {"text": chunk.content}
+            answer = "".join(parts)
+            self._remember_direct(query, answer)
+        except Exception as e:
+            log.exception("❌ Error during direct answer: %s", e)
+            if parts:
+                note = "\n\n❌ The answer was interrupted."
+                yield "token", {"text": note}
+                answer = "".join(parts) + note
+            else:
+                answer = "❌ Something went wrong while processing your message."
+            yield "done", {"result": answer, "error": True}
+            return
+        yield "done", {"result": answer}
+
+    def _with_context(self, query: str, context: str = None) -> str:
+        # Only the passages relevant to the query that fit the token budget
+        if context:
+            context = assemble_context(query, context, reserved_tokens=self.overhead_tokens())
+            query = f"Use the following context to answer accurately:\n\n{context}\n\nUser query: {query}"
+        return query
+
+    @staticmethod
+    def _output(result) -> str:
+        # result might be a dict or string
+        if isinstance(result, dict):
+            return result.get("output", str(result))
+        return str(result)
+
+    def invoke(self, query: str, context: str = None, callbacks=None) -> str:
         """
         Handles user query, optionally injecting context (like from PDF or URL ingestion).
         - Splits context if too long.
         """
         try:
-            # Option 1: Prepend context safely
-            if context:
-                max_chars = 3000  # adjust based on LLM token limit
-                context = context[:max_chars] + ("..." if len(context) > max_chars else "")
-                query = f"Use the following context to answer accurately:\n\n{context}\n\nUser query: {query}"
+            query = self._with_context(query, context)
 
             # Invoke the agent
-            result = self.agent.invoke({"input": query})
-            # result might be a dict or string
-            if isinstance(result, dict):
-                return result.get("output", str(result))
-            return str(result)
+            config = {"callbacks": callbacks} if callbacks else None
+            return self._output(self.agent.invoke({"input": query}, config=config))
+
+        except Exception as e:
+            log.exception("❌ Error during agent invocation: %s", e)
+            return "❌ Something went wrong while processing your message."
+
+    async def ainvoke(self, query: str, context: str = None, callbacks=None) -> str:
+        """Async invoke: LLM and tool calls are awaited instead of blocking a thread."""
+        try:
+            query = self._with_context(query, context)
+            config = {"callbacks": callbacks} if callbacks else None
+            return self._output(await self.agent.ainvoke({"input": query}, config=config))
 
         except Exception as e:
-            print("❌ Error during agent invocation:", e)
-            traceback.print_exc()
+            log.exception("❌ Error during agent invocation: %s", e)
             return "❌ Something went wrong while processing your message."
     
+    def stream(self, query: str, context: str = None, callbacks=None):
+        """
+        Runs the agent on a worker thread and yields (event, data) pairs as they
+        happen: ("status", {...}) for tool calls, ("token", {"text"}) for pieces
+        of the final answer, then ("done", {"result"}) with the full reply.
+        """
+        events = queue.Queue()
+        handler = StreamingHandler(lambda event, data: events.put((event, data)))
+        result = {}
+
+        def run():
+            try:
+                result["output"] = self.invoke(query, context=context, callbacks=[handler] + list(callbacks or []))
+            finally:
+                events.put(None)
+
+        worker = threading.Thread(target=in_context(run), daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = events.get()
+                if item is None:
+                    break
+                yield item
+            yield "done", {"result": result.get("output", "❌ Something went wrong while processing your message.")}
+        finally:
+            # Memory belongs to this run until it ends, even if the client left
+            worker.join()
+
     def add_to_memory(self, content: str, role: str = "user"):
         """
         Safely adds content to agent memory.
@@ -55,9 +313,8 @@ class AgentController:
             elif role == "system":
                 self.agent.memory.chat_memory.add_system_message(content)
             else:
-                print(f"⚠️ Unknown role: {role}, treating as user message")
+                log.warning("⚠️ Unknown role: %s, treating as user message", role)
                 self.agent.memory.chat_memory.add_user_message(content)
         except Exception as e:
-            print("❌ Error adding content to memory:", e)
-            traceback.print_exc()
+            log.exception("❌ Error adding content to memory: %s", e)
 
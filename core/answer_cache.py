@@ -0,0 +1,146 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.metrics import log
+
+# ============================
+# Answer cache settings
+# ============================
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "600"))
+ANSWER_CACHE_MAX_ITEMS = int(os.getenv("ANSWER_CACHE_MAX_ITEMS", "1000"))
+# Cosine similarity for near-duplicate questions; 0 disables the semantic lookup.
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))
+
+
+def normalize_question(question: str) -> str:
+    """Lower-cases, collapses whitespace and drops trailing punctuation."""
+    question = " ".join(question.lower().split())
+    return re.sub(r"[\s?!.]+$", "", question)
+
+
+def context_fingerprint(context: str) -> str:
+    """Stable hash of the active ingested context ('' when nothing is ingested)."""
+    if not context:
+        return ""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerCache:
+    """
+    TTL + LRU cache of final agent answers keyed by (normalised question, context hash,
+    scope). `scope` separates answers that also depend on something besides the
+    context, e.g. one session's chat history; "" is shared by everyone.
+    With an embeddings model and a similarity threshold, questions that miss the
+    exact key fall back to the most similar cached question for the same context
+    and scope.
+    """
+
+    def __init__(self, max_items: int = ANSWER_CACHE_MAX_ITEMS, ttl: float = ANSWER_CACHE_TTL,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY, embeddings=None):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.embeddings = embeddings
+        self._entries = OrderedDict()   # key -> (answer, context_hash, expires_at, vector, scope)
+        self._lock = threading.Lock()
+        self._hits_exact = 0
+        self._hits_semantic = 0
+        self._misses = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embeddings is not None and self.similarity_threshold > 0
+
+    @staticmethod
+    def _key(question: str, context_hash: str, scope: str = "") -> str:
+        return f"{scope}/{context_hash}:{hashlib.sha256(normalize_question(question).encode('utf-8')).hexdigest()}"
+
+    def _embed(self, question: str):
+        try:
+            vector = np.asarray(self.embeddings.embed_query(normalize_question(question)), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else vector
+        except Exception as e:
+            log.warning("⚠️ Answer cache embedding failed: %s", e)
+            return None
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry[2] <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, question: str, context_hash: str = "", scope: str = ""):
+        """Returns a cached answer or None."""
+        key = self._key(question, context_hash, scope)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[2] > now:
+                self._entries.move_to_end(key)
+                self._hits_exact += 1
+                return entry[0]
+            if entry:
+                del self._entries[key]
+            if not self.semantic_enabled:
+                self._misses += 1
+                return None
+
+        query = self._embed(question)
+        with self._lock:
+            if query is not None:
+                self._evict_expired(now)
+                candidates = [
+                    (candidate_key, entry) for candidate_key, entry in self._entries.items()
+                    if entry[1] == context_hash and entry[4] == scope and entry[3] is not None
+                ]
+                if candidates:
+                    matrix = np.stack([entry[3] for _, entry in candidates])
+                    scores = matrix @ query
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        best_key, best_entry = candidates[best]
+                        self._entries.move_to_end(best_key)
+                        self._hits_semantic += 1
+                        return best_entry[0]
+            self._misses += 1
+            return None
+
+    def put(self, question: str, context_hash: str, answer: str, scope: str = ""):
+        vector = self._embed(question) if self.semantic_enabled else None
+        key = self._key(question, context_hash, scope)
+        with self._lock:
+            self._entries[key] = (answer, context_hash, time.time() + self.ttl, vector, scope)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, context_hash: str = None, scope: str = None):
+        """Drops entries for one context hash and/or one scope, or everything when neither is given."""
+        with self._lock:
+            if context_hash is None and scope is None:
+                self._entries.clear()
+                return
+            stale = [
+                key for key, entry in self._entries.items()
+                if (context_hash is None or entry[1] == context_hash) and (scope is None or entry[4] == scope)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._hits_exact + self._hits_semantic
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits_exact": self._hits_exact,
+                "hits_semantic": self._hits_semantic,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
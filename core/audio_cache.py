@@ -0,0 +1,165 @@
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from core.metrics import log
+
+# ============================
+# Content-addressed audio cache
+# ============================
+# Synthesised speech keyed by sha256(model, voice, text). Recent clips stay in
+# a byte-capped in-memory LRU; every clip is also written to disk (when a
+# directory is configured), so replays survive restarts and other workers.
+# The disk copy is capped too: once it grows past TTS_CACHE_DISK_MB the least
+# recently used files (by mtime, refreshed on every disk hit) are deleted.
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tts_cache"))
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "64"))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "512"))
+
+
+def audio_key(text: str, voice: str, model: str) -> str:
+    return hashlib.sha256("\x00".join((model, voice, text)).encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = int(TTS_CACHE_MEMORY_MB * 1024 * 1024),
+                 max_disk_bytes: int = int(TTS_CACHE_DISK_MB * 1024 * 1024)):
+        self.directory = directory or None
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()   # key -> bytes
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._disk_bytes = 0
+        self._evicted_files = 0
+        self._sweep_lock = threading.Lock()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _disk_files(self):
+        """[(mtime, size, path)] of every cached clip on disk."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _sweep(self):
+        """Deletes the least recently used clips until the disk copy is at 90% of its cap."""
+        # One sweep at a time; a put that finds one running just moves on
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            # Re-measured from the directory, which other workers write to as well
+            files = sorted(self._disk_files())
+            total = sum(size for _, size, _ in files)
+            target = self.max_disk_bytes * 0.9
+            evicted = 0
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                evicted += 1
+            with self._lock:
+                self._disk_bytes = total
+                self._evicted_files += evicted
+        finally:
+            self._sweep_lock.release()
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._memory[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get(self, key: str):
+        """Audio bytes for key, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return data
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                # Marks the clip as recently used for the disk eviction
+                os.utime(path)
+            except OSError:
+                data = None
+            if data:
+                self._remember(key, data)
+                with self._lock:
+                    self._disk_hits += 1
+                return data
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key: str, data: bytes):
+        if not data:
+            return
+        self._remember(key, data)
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial clip
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning("⚠️ Could not write TTS cache file: %s", e)
+            return
+        with self._lock:
+            self._disk_bytes += len(data)
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._sweep()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._size,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 4) if lookups else 0.0,
+                "directory": self.directory,
+                "disk_bytes": self._disk_bytes,
+                "disk_evicted": self._evicted_files,
+            }
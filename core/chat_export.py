@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import uuid
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from core.metrics import in_context, log
+
+# ============================
+# Chat export
+# ============================
+# Exports render from the transcript kept on the server session, not from a
+# history the browser uploads. Markdown and JSONL are generated exchange by
+# exchange and streamed. PDF is not incremental: FPDF builds the whole
+# document in memory before writing it, so PDFs are capped at
+# EXPORT_PDF_MAX_EXCHANGES exchanges (longer chats export as md/jsonl). They are
+# written to disk, on a background job for long conversations, and downloaded
+# from there.
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "chat_exports"))
+EXPORT_SYNC_MAX_EXCHANGES = int(os.getenv("EXPORT_SYNC_MAX_EXCHANGES", "50"))
+EXPORT_PDF_MAX_EXCHANGES = int(os.getenv("EXPORT_PDF_MAX_EXCHANGES", "1000"))
+EXPORT_JOB_TTL = float(os.getenv("EXPORT_JOB_TTL", "3600"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", "2"))
+
+EXPORT_FORMATS = {
+    "md": ("text/markdown", "md"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "pdf": ("application/pdf", "pdf"),
+}
+
+
+def normalize_exchanges(chat_history):
+    """Accepts [{"user", "agent", "time"}] or the browser's [[user, agent], ...] pairs."""
+    exchanges = []
+    for item in chat_history or []:
+        if isinstance(item, dict):
+            exchanges.append({"user": item.get("user", ""), "agent": item.get("agent", ""), "time": item.get("time")})
+        else:
+            user_msg, agent_msg = (list(item) + ["", ""])[:2]
+            exchanges.append({"user": user_msg or "", "agent": agent_msg or "", "time": None})
+    return exchanges
+
+
+def export_filename(fmt: str, prefix: str = "chat_export") -> str:
+    return f"{prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[fmt][1]}"
+
+
+def _stamp(exchange) -> str:
+    return datetime.fromtimestamp(exchange["time"]).strftime("%Y-%m-%d %H:%M") if exchange.get("time") else ""
+
+
+def iter_markdown(exchanges):
+    yield "# Chat History\n\n"
+    for i, exchange in enumerate(exchanges, 1):
+        stamp = _stamp(exchange)
+        yield f"## Exchange {i}" + (f" · {stamp}" if stamp else "") + "\n\n"
+        yield f"**User:** {exchange['user']}\n\n**Agent:** {exchange['agent']}\n\n"
+
+
+def iter_jsonl(exchanges):
+    for i, exchange in enumerate(exchanges, 1):
+        yield json.dumps({"exchange": i, **exchange}, ensure_ascii=False) + "\n"
+
+
+def _latin1(text: str) -> str:
+    # FPDF core fonts only cover latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+
+def write_pdf(exchanges, path: str):
+    """
+    Renders the exchanges to a PDF file at path. The document is held in memory
+    until it is written, hence the EXPORT_PDF_MAX_EXCHANGES cap (ValueError).
+    """
+    from fpdf import FPDF
+
+    if len(exchanges) > EXPORT_PDF_MAX_EXCHANGES:
+        raise ValueError(f"PDF exports are limited to {EXPORT_PDF_MAX_EXCHANGES} exchanges; use md or jsonl")
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "Chat History", ln=True, align="C")
+
+    for i, exchange in enumerate(exchanges, 1):
+        stamp = _stamp(exchange)
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 8, f"--- Exchange {i} ---" + (f"  {stamp}" if stamp else ""), ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.multi_cell(0, 5, _latin1(f"User: {exchange['user']}\n\nAgent: {exchange['agent']}\n\n"))
+
+    tmp_path = f"{path}.part"
+    pdf.output(tmp_path, "F")
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_export(exchanges, fmt: str, path: str):
+    """Writes any export format to path."""
+    if fmt == "pdf":
+        return write_pdf(exchanges, path)
+    chunks = iter_markdown(exchanges) if fmt == "md" else iter_jsonl(exchanges)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.writelines(chunks)
+    os.replace(tmp_path, path)
+    return path
+
+
+class ExportJobs:
+    """Background exports, downloadable by the session that started them until they expire."""
+
+    def __init__(self, directory: str = EXPORT_DIR, workers: int = EXPORT_WORKERS, ttl: float = EXPORT_JOB_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="export")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _expire(self, now: float):
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] != "running" and now - job["created"] > self.ttl]
+            jobs = [self._jobs.pop(job_id) for job_id in expired]
+        for job in jobs:
+            try:
+                os.remove(job["path"])
+            except OSError:
+                pass
+
+    def submit(self, session_id: str, exchanges, fmt: str) -> dict:
+        now = time.time()
+        self._expire(now)
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "session_id": session_id,
+            "format": fmt,
+            "status": "running",
+            "exchanges": len(exchanges),
+            "created": now,
+            "filename": export_filename(fmt),
+            "path": os.path.join(self.directory, f"{job_id}.{EXPORT_FORMATS[fmt][1]}"),
+            "error": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        self._pool.submit(in_context(self._run), job, list(exchanges))
+        return self.describe(job)
+
+    def _run(self, job, exchanges):
+        try:
+            write_export(exchanges, job["format"], job["path"])
+            job["status"] = "ready"
+        except Exception as e:
+            log.error("❌ Export job failed: %s", e)
+            job["error"] = str(e)
+            job["status"] = "error"
+
+    def get(self, job_id: str, session_id: str):
+        """The job if it exists and belongs to session_id, else None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job["session_id"] != session_id:
+            return None
+        return job
+
+    @staticmethod
+    def describe(job) -> dict:
+        return {key: job[key] for key in ("id", "format", "status", "exchanges", "filename", "error")}
+
+    def stats(self) -> dict:
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ("running", "ready", "error")}
@@ -0,0 +1,93 @@
+import os
+from functools import lru_cache
+
+# ============================
+# Token-aware chunking
+# ============================
+# text-embedding-3-* and gpt-4o-mini count tokens with tiktoken. When tiktoken
+# (or its encoding files) is unavailable we fall back to whitespace words,
+# scaled by ~0.75 words per token so chunk sizes stay comparable.
+
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "500"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "60"))
+TOKENIZER_ENCODING = "cl100k_base"
+_WORDS_PER_TOKEN = 0.75
+
+
+class _WordEncoding:
+    """Whitespace fallback with the same encode/decode shape as a tiktoken encoding."""
+
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKENIZER_ENCODING)
+    except Exception as e:
+        print(f"⚠️ tiktoken unavailable ({e}); counting whitespace words instead.")
+        return _WordEncoding()
+
+
+def _scaled(tokens: int, encoding) -> int:
+    if isinstance(encoding, _WordEncoding):
+        return max(1, int(tokens * _WORDS_PER_TOKEN))
+    return tokens
+
+
+def count_tokens(text: str) -> int:
+    encoding = get_encoding()
+    count = len(encoding.encode(text))
+    if isinstance(encoding, _WordEncoding):
+        return int(count / _WORDS_PER_TOKEN)
+    return count
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The first `max_tokens` tokens of text (text itself when it already fits)."""
+    encoding = get_encoding()
+    tokens = encoding.encode(text)
+    limit = _scaled(max_tokens, encoding)
+    if len(tokens) <= limit:
+        return text
+    return encoding.decode(tokens[:limit]).rstrip() + " ..."
+
+
+def iter_chunks(segments, chunk_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+    """
+    Streams overlapping chunks of at most `chunk_tokens` tokens from an iterable
+    of text segments (pages, paragraphs, ...). Only one chunk's worth of tokens
+    is buffered, so memory stays flat however long the document is.
+    """
+    if overlap_tokens >= chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+
+    encoding = get_encoding()
+    size = _scaled(chunk_tokens, encoding)
+    overlap = _scaled(overlap_tokens, encoding)
+    step = size - overlap
+
+    buffer = []
+    emitted = False
+    fresh = 0  # tokens in the buffer not yet part of an emitted chunk
+    for segment in segments:
+        if not segment or not segment.strip():
+            continue
+        tokens = encoding.encode(segment if segment.endswith((" ", "\n")) else segment + "\n")
+        buffer.extend(tokens)
+        fresh += len(tokens)
+        while len(buffer) >= size:
+            yield encoding.decode(buffer[:size]).strip()
+            emitted = True
+            buffer = buffer[step:]
+            fresh = max(0, len(buffer) - overlap)
+
+    if buffer and (fresh > 0 or not emitted):
+        tail = encoding.decode(buffer).strip()
+        if tail:
+            yield tail
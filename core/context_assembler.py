@@ -0,0 +1,127 @@
+import os
+import re
+import math
+import threading
+from collections import Counter, OrderedDict
+
+from core.answer_cache import context_fingerprint
+from core.chunking import count_tokens, iter_chunks
+
+# ============================
+# Token-budgeted context assembly
+# ============================
+# Ingested content is split once into passages of ~CONTEXT_PASSAGE_TOKENS,
+# ranked against each question with BM25, and the best passages are packed
+# into what is left of CONTEXT_TOKEN_BUDGET after the agent's own prompt,
+# tool descriptions and chat memory. Passages are emitted in document order.
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "2500"))
+CONTEXT_MIN_TOKENS = int(os.getenv("CONTEXT_MIN_TOKENS", "300"))
+CONTEXT_PASSAGE_TOKENS = int(os.getenv("CONTEXT_PASSAGE_TOKENS", "200"))
+_INDEX_CACHE_SIZE = 32
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+_GAP = "\n[...]\n"
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "please tell that the this to was what when where which who why with you your".split()
+)
+
+
+def _terms(text: str):
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+class _PassageIndex:
+    def __init__(self, context: str):
+        paragraphs = re.split(r"\n\s*\n", context)
+        self.passages = list(iter_chunks(paragraphs, chunk_tokens=CONTEXT_PASSAGE_TOKENS, overlap_tokens=0))
+        self.tokens = [count_tokens(passage) for passage in self.passages]
+        self.total_tokens = sum(self.tokens)
+        self.term_counts = [Counter(_terms(passage)) for passage in self.passages]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.doc_freq = Counter(term for counts in self.term_counts for term in counts)
+
+    def scores(self, question: str):
+        terms = set(_terms(question))
+        n = len(self.passages)
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            for term in terms:
+                tf = counts.get(term)
+                if not tf:
+                    continue
+                idf = math.log(1 + (n - self.doc_freq[term] + 0.5) / (self.doc_freq[term] + 0.5))
+                norm = 1 - _BM25_B + _BM25_B * length / (self.avg_length or 1)
+                score += idf * tf * (_BM25_K1 + 1) / (tf + _BM25_K1 * norm)
+            scores.append(score)
+        return scores
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _index_for(context: str) -> _PassageIndex:
+    """Passage index for context, built once per distinct ingested content."""
+    key = context_fingerprint(context)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = _PassageIndex(context)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def context_budget(question: str, reserved_tokens: int = 0, budget: int = CONTEXT_TOKEN_BUDGET,
+                   max_tokens: int = CONTEXT_MAX_TOKENS) -> int:
+    """Tokens left for ingested content once the prompt overhead and question are accounted for."""
+    available = budget - reserved_tokens - count_tokens(question)
+    return max(CONTEXT_MIN_TOKENS, min(max_tokens, available))
+
+
+def assemble_context(question: str, context: str, reserved_tokens: int = 0,
+                     budget: int = CONTEXT_TOKEN_BUDGET, max_tokens: int = CONTEXT_MAX_TOKENS) -> str:
+    """
+    The passages of context most relevant to question that fit the token
+    budget, in document order, with "[...]" where passages were skipped.
+    Content that already fits is returned whole. `reserved_tokens` is what the
+    rest of the prompt (agent instructions, tools, memory) will take.
+    """
+    if not context or not context.strip():
+        return ""
+    available = context_budget(question, reserved_tokens, budget, max_tokens)
+    index = _index_for(context)
+    if index.total_tokens <= available:
+        return context.strip()
+
+    scores = index.scores(question)
+    # Best score first; ties (including "no overlap at all") keep document order
+    order = sorted(range(len(index.passages)), key=lambda i: (-scores[i], i))
+    chosen, used = [], 0
+    for i in order:
+        if used + index.tokens[i] <= available:
+            chosen.append(i)
+            used += index.tokens[i]
+        if available - used < CONTEXT_PASSAGE_TOKENS // 4:
+            break
+
+    chosen.sort()
+    parts = []
+    for position, i in enumerate(chosen):
+        if position and i != chosen[position - 1] + 1:
+            parts.append(_GAP)
+        elif position:
+            parts.append("\n")
+        parts.append(index.passages[i])
+    return "".join(parts)
@@ -0,0 +1,172 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from dotenv import load_dotenv
+from langchain_core.embeddings import Embeddings
+
+# ============================
+# Load environment variables
+# ============================
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embeddings.sqlite3"))
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+
+_SQL_BATCH = 500
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalises and collapses whitespace so trivial variants share a cache entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def embedding_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Content-addressed cache in front of another Embeddings implementation.
+    Lookups go memory LRU -> SQLite -> provider; only misses reach the provider,
+    in a single batched call. Queries and documents share the same keys.
+    """
+
+    def __init__(self, underlying: Embeddings, model: str, db_path: str = None,
+                 memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS):
+        self.underlying = underlying
+        self.model = model
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits_memory = 0
+        self._hits_disk = 0
+        self._misses = 0
+
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    # ----------------------------
+    # Memory tier
+    # ----------------------------
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    # ----------------------------
+    # Disk tier
+    # ----------------------------
+    def _load_from_disk(self, keys):
+        found = {}
+        if self._db is None or not keys:
+            return found
+        for start in range(0, len(keys), _SQL_BATCH):
+            batch = keys[start:start + _SQL_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def _save_to_disk(self, items):
+        if self._db is None or not items:
+            return
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+            [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items],
+        )
+        self._db.commit()
+
+    # ----------------------------
+    # Embeddings interface
+    # ----------------------------
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [embedding_key(self.model, text) for text in texts]
+        results = {}
+
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in results:
+                    self._memory.move_to_end(key)
+                    results[key] = self._memory[key]
+            self._hits_memory += sum(1 for key in keys if key in results)
+
+            pending = list(dict.fromkeys(key for key in keys if key not in results))
+            from_disk = self._load_from_disk(pending)
+            for key, vector in from_disk.items():
+                results[key] = vector
+                self._remember(key, vector)
+            self._hits_disk += sum(1 for key in keys if key in from_disk)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in results:
+                missing.setdefault(key, text)
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = list(zip(missing.keys(), vectors))
+            with self._lock:
+                self._misses += sum(1 for key in keys if key in missing)
+                for key, vector in computed:
+                    results[key] = vector
+                    self._remember(key, vector)
+                self._save_to_disk(computed)
+
+        return [list(results[key]) for key in keys]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    # ----------------------------
+    # Stats
+    # ----------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._hits_memory + self._hits_disk
+            lookups = hits + self._misses
+            return {
+                "model": self.model,
+                "memory_items": len(self._memory),
+                "hits_memory": self._hits_memory,
+                "hits_disk": self._hits_disk,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def get_embeddings(model: str = EMBEDDING_MODEL) -> CachedEmbeddings:
+    """Returns the process-wide cached OpenAI embeddings for `model`."""
+    with _shared_lock:
+        if model not in _shared:
+            from langchain_openai import OpenAIEmbeddings
+
+            _shared[model] = CachedEmbeddings(
+                OpenAIEmbeddings(model=model, openai_api_key=OPENAI_API_KEY),
+                model=model,
+                db_path=EMBEDDING_CACHE_PATH or None,
+            )
+        return _shared[model]
@@ -0,0 +1,144 @@
+import os
+import re
+
+from bs4 import BeautifulSoup
+
+from core.metrics import log
+
+# ============================
+# HTML main-content extraction
+# ============================
+# "fast" parses with lxml (C), strips boilerplate and keeps the densest text
+# block, readability-style. "legacy" is the original BeautifulSoup
+# html.parser + all-<p> behaviour and is used as the fallback whenever lxml
+# is missing, fails, or finds too little text.
+
+HTML_EXTRACT_ENGINE = os.getenv("HTML_EXTRACT_ENGINE", "fast").lower()
+HTML_MAX_BYTES = int(os.getenv("HTML_MAX_BYTES", str(2 * 1024 * 1024)))
+MIN_MAIN_TEXT_CHARS = 200
+
+_BOILERPLATE_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select",
+)
+_BOILERPLATE_HINTS = re.compile(
+    r"comment|footer|sidebar|side-bar|menu|navbar|breadcrumb|share|social|cookie|consent|"
+    r"banner|advert|\bads?\b|promo|related|newsletter|subscribe|popup|modal",
+    re.IGNORECASE,
+)
+_CONTENT_HINTS = re.compile(r"article|body|content|main|post|entry|story", re.IGNORECASE)
+_TEXT_TAGS = ("p", "h1", "h2", "h3", "h4", "li", "blockquote", "pre")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def read_capped(response, max_bytes: int = HTML_MAX_BYTES) -> bytes:
+    """Reads a streamed response body, stopping after `max_bytes`."""
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body.extend(chunk)
+            if len(body) >= max_bytes:
+                del body[max_bytes:]
+                break
+    finally:
+        response.close()
+    return bytes(body)
+
+
+def extract_legacy(content) -> str:
+    soup = BeautifulSoup(content, "html.parser")
+    paragraphs = soup.find_all("p")
+    return " ".join([p.get_text() for p in paragraphs]).strip()
+
+
+def _clean(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _link_density(element) -> float:
+    text_len = len(element.text_content())
+    if not text_len:
+        return 0.0
+    link_len = sum(len(a.text_content()) for a in element.iter("a"))
+    return link_len / text_len
+
+
+def _drop_boilerplate(root):
+    from lxml import etree
+
+    etree.strip_elements(root, etree.Comment, *_BOILERPLATE_TAGS, with_tail=False)
+    for element in list(root.iter()):
+        if not isinstance(element.tag, str) or element.tag in ("html", "body", "article", "main"):
+            continue
+        hints = f"{element.get('class', '')} {element.get('id', '')} {element.get('role', '')}"
+        if (hints.strip() and _BOILERPLATE_HINTS.search(hints) and not _CONTENT_HINTS.search(hints)
+                and element.getparent() is not None):
+            element.drop_tree()
+
+
+def _best_container(root):
+    """Scores each parent of a paragraph by the text it holds (readability-lite)."""
+    for tag in ("article", "main"):
+        candidates = [el for el in root.iter(tag) if len(el.text_content()) >= MIN_MAIN_TEXT_CHARS]
+        if candidates:
+            return max(candidates, key=lambda el: len(el.text_content()))
+
+    scores = {}
+    for p in root.iter("p"):
+        length = len(_clean(p.text_content()))
+        if length < 25:
+            continue
+        parent = p.getparent()
+        if parent is None:
+            continue
+        score = 1 + min(length // 100, 3) + length / 100
+        scores[parent] = scores.get(parent, 0) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + score / 2
+    if not scores:
+        return None
+    return max(scores, key=lambda el: scores[el] * (1 - _link_density(el)))
+
+
+def extract_fast(content) -> str:
+    import lxml.html
+
+    root = lxml.html.document_fromstring(content)
+    _drop_boilerplate(root)
+    container = _best_container(root)
+    if container is None:
+        return ""
+    if container.tag in _TEXT_TAGS:
+        return _clean(container.text_content())
+
+    def nested(element):
+        # Text tags inside other text tags (li > p) would repeat their text
+        for ancestor in element.iterancestors():
+            if ancestor is container:
+                return False
+            if ancestor.tag in _TEXT_TAGS:
+                return True
+        return False
+
+    blocks = []
+    for element in container.iter(*_TEXT_TAGS):
+        if nested(element):
+            continue
+        text = _clean(element.text_content())
+        if text and _link_density(element) < 0.5:
+            blocks.append(text)
+    return "\n".join(blocks)
+
+
+def extract_text(content, engine: str = None) -> str:
+    """Extracts readable text from HTML bytes/str with the configured engine."""
+    engine = (engine or HTML_EXTRACT_ENGINE).lower()
+    if engine == "fast":
+        try:
+            text = extract_fast(content)
+            if len(text) >= MIN_MAIN_TEXT_CHARS:
+                return text
+        except Exception as e:
+            log.warning("⚠️ Fast HTML extraction failed, using legacy parser: %s", e)
+    return extract_legacy(content)
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ============================
+# Pooled, conditional HTTP fetching
+# ============================
+# One shared requests.Session (keep-alive connection pools per host), per-host
+# concurrency limits, and ETag / Last-Modified validators persisted in SQLite
+# so re-fetching an unchanged page costs a 304 instead of a full download.
+
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "64"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "4"))
+HTTP_VALIDATORS_PATH = os.getenv("HTTP_VALIDATORS_PATH", os.path.join(".cache", "http_validators.sqlite3"))
+USER_AGENT = "AI-Content-Coach/1.0 (+content ingestion)"
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the process-wide pooled session."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=(429, 502, 503, 504),
+                          allowed_methods=("GET", "HEAD"))
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+
+class ValidatorStore:
+    """ETag / Last-Modified per URL, recorded only after a successful ingest."""
+
+    def __init__(self, db_path: str = HTTP_VALIDATORS_PATH):
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS validators (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)"
+            )
+            self._db.commit()
+
+    def get(self, url: str):
+        with self._lock:
+            if url in self._memory:
+                return self._memory[url]
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT etag, last_modified FROM validators WHERE url = ?", (url,)).fetchone()
+            return row
+
+    def put(self, url: str, etag: str = None, last_modified: str = None):
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._memory[url] = (etag, last_modified)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO validators (url, etag, last_modified) VALUES (?, ?, ?)",
+                    (url, etag, last_modified),
+                )
+                self._db.commit()
+
+    def forget(self, url: str):
+        with self._lock:
+            self._memory.pop(url, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM validators WHERE url = ?", (url,))
+                self._db.commit()
+
+
+class HostLimiter:
+    """Caps concurrent requests per host."""
+
+    def __init__(self, per_host: int = HTTP_PER_HOST_LIMIT):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def for_url(self, url: str) -> threading.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+_validators = None
+
+
+def get_validators() -> ValidatorStore:
+    global _validators
+    with _session_lock:
+        if _validators is None:
+            _validators = ValidatorStore()
+        return _validators
+
+
+def _release_on_close(response, semaphore):
+    """Holds a host slot until the streamed body has been read and the response closed."""
+    close = response.close
+    once = threading.Lock()
+
+    def close_and_release():
+        try:
+            close()
+        finally:
+            if once.acquire(blocking=False):
+                semaphore.release()
+
+    response.close = close_and_release
+
+
+def fetch(url: str, conditional: bool = True, timeout: float = HTTP_TIMEOUT, limiter: HostLimiter = None,
+          stream: bool = False, validator_key: str = None):
+    """
+    GETs `url` with the shared session. Returns the response; a 304 means the
+    page is unchanged since it was last ingested. With stream=True the body is
+    left unread (see core.html_extract.read_capped) and the caller must close
+    the response, which frees its slot in `limiter`. Validators are looked up
+    under `validator_key` (default: the URL).
+    """
+    headers = {}
+    if conditional:
+        known = get_validators().get(validator_key or url)
+        if known:
+            etag, last_modified = known
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+    semaphore = limiter.for_url(url) if limiter else None
+    if semaphore:
+        semaphore.acquire()
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout, stream=stream)
+    except BaseException:
+        if semaphore:
+            semaphore.release()
+        raise
+    if semaphore:
+        if stream:
+            _release_on_close(response, semaphore)
+        else:
+            semaphore.release()
+    if response.status_code != 304:
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+    return response
+
+
+def map_urls(urls, handler, max_workers: int = 16, per_host: int = HTTP_PER_HOST_LIMIT):
+    """
+    Runs handler(url, limiter) for every URL on a thread pool and yields
+    (url, result, error) as each one finishes.
+    """
+    limiter = HostLimiter(per_host)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(handler, url, limiter): url for url in dict.fromkeys(urls)}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                yield url, future.result(), None
+            except Exception as e:
+                yield url, None, e
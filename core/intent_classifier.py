@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import math
+import time
+import random
+import threading
+from collections import Counter
+
+# ============================
+# Local intent classifier
+# ============================
+# Greetings, thanks, goodbyes, small talk and empty messages are answered
+# locally, with no provider call. Rules are anchored regexes over short
+# messages; with INTENT_TRAINING_FILE set, a multinomial naive Bayes model
+# trained from labelled examples catches phrasings the rules miss.
+
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "true").lower() == "true"
+INTENT_TRAINING_FILE = os.getenv("INTENT_TRAINING_FILE")
+INTENT_MIN_CONFIDENCE = float(os.getenv("INTENT_MIN_CONFIDENCE", "0.85"))
+INTENT_MAX_WORDS = int(os.getenv("INTENT_MAX_WORDS", "8"))
+
+TRIVIAL_INTENTS = ("empty", "greeting", "thanks", "goodbye", "smalltalk")
+_WORD = re.compile(r"[a-z']+")
+
+RULES = [
+    ("empty", re.compile(r"^[\W_]*$")),
+    ("greeting", re.compile(
+        r"^(hi+|hey+|hello+|hiya|yo|howdy|greetings|good (morning|afternoon|evening|day))"
+        r"( there| coach| everyone| all)?[\s!.,:)]*$")),
+    ("thanks", re.compile(
+        r"^((thanks?|thank you|thx|ty|cheers)( (so|very) much| a lot| again)?|much appreciated|appreciate it)"
+        r"[\s!.,:)]*$")),
+    ("goodbye", re.compile(r"^(bye+|goodbye|good night|see (you|ya)( later| soon)?|cya|take care)[\s!.,:)]*$")),
+    # Bare acknowledgements ("ok", "great", "got it", "later") are left out on
+    # purpose: after an offer from the agent they mean "go ahead"
+    ("smalltalk", re.compile(
+        r"^(how are you( doing| today)?|how'?s it going|what'?s up|sup|who are you|what are you|"
+        r"what can you do)[\s!.,?:)]*$")),
+]
+
+REPLIES = {
+    "thanks": [
+        "You're welcome! Anything else you'd like to work on?",
+        "Happy to help! Let me know what you'd like to create next.",
+    ],
+    "goodbye": [
+        "Bye for now! Come back any time you need content ideas. 👋",
+        "Take care, and good luck with your next post!",
+    ],
+    "smalltalk": [
+        "I'm your AI Content Coach: ask me about growth, SEO, captions, analytics or the latest AI news.",
+        "All good here! What are you working on today?",
+    ],
+    "empty": [
+        "Could you tell me a bit more about what you need help with?",
+    ],
+}
+
+
+def _tokens(text: str):
+    return _WORD.findall(text.lower())
+
+
+class NaiveBayes:
+    """Multinomial naive Bayes over word unigrams with add-one smoothing."""
+
+    def __init__(self, examples):
+        self.class_counts = Counter(label for _, label in examples)
+        self.word_counts = {label: Counter() for label in self.class_counts}
+        for text, label in examples:
+            self.word_counts[label].update(_tokens(text))
+        self.vocab = {word for counts in self.word_counts.values() for word in counts}
+        self.totals = {label: sum(counts.values()) for label, counts in self.word_counts.items()}
+        self.n_examples = len(examples)
+
+    def predict(self, text: str):
+        """(label, probability) of the most likely class."""
+        words = _tokens(text)
+        vocab_size = len(self.vocab) or 1
+        scores = {}
+        for label, count in self.class_counts.items():
+            score = math.log(count / self.n_examples)
+            denominator = self.totals[label] + vocab_size
+            for word in words:
+                score += math.log((self.word_counts[label][word] + 1) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        # Softmax over log scores for a confidence in [0, 1]
+        norm = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / norm
+
+
+def load_examples(path: str):
+    """Labelled examples from JSONL ({"text", "label"}) or tab-separated "text<TAB>label" lines."""
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                item = json.loads(line)
+                examples.append((item["text"], item["label"]))
+            else:
+                text, _, label = line.rpartition("\t")
+                if text:
+                    examples.append((text, label.strip()))
+    return examples
+
+
+class IntentClassifier:
+    def __init__(self, training_file: str = INTENT_TRAINING_FILE, min_confidence: float = INTENT_MIN_CONFIDENCE,
+                 max_words: int = INTENT_MAX_WORDS):
+        self.min_confidence = min_confidence
+        self.max_words = max_words
+        self.model = None
+        if training_file:
+            try:
+                self.model = NaiveBayes(load_examples(training_file))
+                print(f"✅ Intent model trained on {self.model.n_examples} examples.")
+            except Exception as e:
+                print(f"⚠️ Could not train intent model from {training_file}: {e}")
+        self._lock = threading.Lock()
+        self._messages = 0
+        self._deflected = Counter()
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def classify(self, text: str):
+        """The trivial intent of text, or None when it needs a real answer."""
+        started = time.perf_counter()
+        intent = self._classify(text)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._messages += 1
+            if intent:
+                self._deflected[intent] += 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+        return intent
+
+    def _classify(self, text: str):
+        message = " ".join(text.lower().split())
+        for intent, pattern in RULES:
+            if pattern.match(message):
+                return intent
+        if self.model is None or len(message.split()) > self.max_words:
+            return None
+        label, confidence = self.model.predict(message)
+        # Any other label in the training file (e.g. "question") means "answer it properly"
+        if label in TRIVIAL_INTENTS and confidence >= self.min_confidence:
+            return label
+        return None
+
+    @staticmethod
+    def reply(intent: str) -> str:
+        if intent == "greeting":
+            from tools.greeting import greet_user
+            return greet_user()["answer"]
+        return random.choice(REPLIES[intent])
+
+    def stats(self) -> dict:
+        with self._lock:
+            deflected = sum(self._deflected.values())
+            return {
+                "model": "rules+naive_bayes" if self.model else "rules",
+                "messages": self._messages,
+                "deflected": deflected,
+                "deflection_rate": round(deflected / self._messages, 4) if self._messages else 0.0,
+                "by_intent": dict(self._deflected),
+                "avg_latency_ms": round(self._latency_total / self._messages * 1000, 4) if self._messages else 0.0,
+                "max_latency_ms": round(self._latency_max * 1000, 4),
+            }
@@ -0,0 +1,316 @@
+import os
+import json
+import uuid
+import threading
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+# ============================
+# Local in-process vector index
+# ============================
+# Vectors live in one contiguous row-major matrix (float32, or int8 with a
+# per-row scale). Rows are L2-normalised on insert, so cosine similarity is a
+# single matrix-vector product. With a persist directory the matrix is a
+# memory-mapped file that grows in place; documents go to an append-only JSONL
+# log that is replayed on load.
+
+_INITIAL_CAPACITY = 1024
+_SEARCH_BLOCK_ROWS = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorStore(VectorStore):
+    """NumPy-backed vector store with vectorised top-k cosine search."""
+
+    def __init__(self, embedding, persist_directory: str = None, index_name: str = "local-index",
+                 quantize: bool = False):
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self.index_name = index_name
+        self.quantize = quantize
+        self._lock = threading.RLock()
+
+        self._dim = None
+        self._count = 0
+        self._capacity = 0
+        self._vectors = None       # (capacity, dim) float32 or int8
+        self._scales = None        # (capacity,) float32, int8 mode only
+        self._alive = np.zeros(0, dtype=bool)
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._row_by_id = {}
+
+        if persist_directory:
+            os.makedirs(persist_directory, exist_ok=True)
+            self._load()
+
+    # ----------------------------
+    # Paths
+    # ----------------------------
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.persist_directory, f"{self.index_name}.{suffix}")
+
+    @property
+    def embeddings(self):
+        return self._embedding
+
+    def __len__(self) -> int:
+        return int(self._alive[:self._count].sum())
+
+    # ----------------------------
+    # Storage management
+    # ----------------------------
+    def _open_matrix(self, suffix, dtype, shape, mode):
+        if not self.persist_directory:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._path(suffix), dtype=dtype, mode=mode, shape=shape)
+
+    def _grow(self, min_rows: int):
+        """Ensures capacity for at least `min_rows` rows, doubling the backing storage."""
+        if min_rows <= self._capacity:
+            return
+        new_capacity = max(_INITIAL_CAPACITY, self._capacity)
+        while new_capacity < min_rows:
+            new_capacity *= 2
+
+        vec_dtype = np.int8 if self.quantize else np.float32
+        if self.persist_directory:
+            if self._vectors is not None:
+                self._vectors.flush()
+                if self._scales is not None:
+                    self._scales.flush()
+            self._vectors = self._resize_file("vectors", vec_dtype, (new_capacity, self._dim))
+            if self.quantize:
+                self._scales = self._resize_file("scales", np.float32, (new_capacity,))
+        else:
+            vectors = np.zeros((new_capacity, self._dim), dtype=vec_dtype)
+            if self._vectors is not None:
+                vectors[:self._count] = self._vectors[:self._count]
+            self._vectors = vectors
+            if self.quantize:
+                scales = np.zeros(new_capacity, dtype=np.float32)
+                if self._scales is not None:
+                    scales[:self._count] = self._scales[:self._count]
+                self._scales = scales
+
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._count] = self._alive[:self._count]
+        self._alive = alive
+        self._capacity = new_capacity
+        self._write_header()
+
+    def _resize_file(self, suffix, dtype, shape):
+        path = self._path(suffix)
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            f.truncate(nbytes)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _write_header(self):
+        if not self.persist_directory:
+            return
+        header = {"dim": self._dim, "capacity": self._capacity, "quantize": self.quantize}
+        tmp_path = self._path("header.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self._path("header.json"))
+
+    def _load(self):
+        header_path = self._path("header.json")
+        if not os.path.exists(header_path):
+            return
+        with open(header_path, encoding="utf-8") as f:
+            header = json.load(f)
+        self._dim = header["dim"]
+        self._capacity = header["capacity"]
+        self.quantize = header.get("quantize", False)
+
+        vec_dtype = np.int8 if self.quantize else np.float32
+        self._vectors = self._open_matrix("vectors", vec_dtype, (self._capacity, self._dim), "r+")
+        if self.quantize:
+            self._scales = self._open_matrix("scales", np.float32, (self._capacity,), "r+")
+        self._alive = np.zeros(self._capacity, dtype=bool)
+
+        docs_path = self._path("docs.jsonl")
+        if not os.path.exists(docs_path):
+            return
+        with open(docs_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                row = record["row"]
+                if record.get("deleted"):
+                    self._alive[row] = False
+                    self._row_by_id.pop(record["id"], None)
+                    continue
+                while len(self._ids) <= row:
+                    self._ids.append(None)
+                    self._texts.append("")
+                    self._metadatas.append({})
+                self._ids[row] = record["id"]
+                self._texts[row] = record["text"]
+                self._metadatas[row] = record.get("metadata", {})
+                self._row_by_id[record["id"]] = row
+                self._alive[row] = True
+        self._count = len(self._ids)
+        print(f"✅ Loaded local vector index '{self.index_name}' ({len(self)} vectors).")
+
+    def _append_log(self, records):
+        if not self.persist_directory or not records:
+            return
+        with open(self._path("docs.jsonl"), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    # ----------------------------
+    # Writes
+    # ----------------------------
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        """Adds pre-computed embeddings. Existing ids are overwritten in place."""
+        texts = list(texts)
+        if not texts:
+            return []
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dim}.")
+
+            rows = []
+            new_rows = 0
+            for doc_id in ids:
+                row = self._row_by_id.get(doc_id)
+                if row is None:
+                    row = self._count + new_rows
+                    new_rows += 1
+                rows.append(row)
+            self._grow(self._count + new_rows)
+
+            rows_arr = np.asarray(rows)
+            if self.quantize:
+                scales = np.abs(vectors).max(axis=1) / 127.0
+                scales[scales == 0] = 1.0
+                self._vectors[rows_arr] = np.round(vectors / scales[:, None]).astype(np.int8)
+                self._scales[rows_arr] = scales
+            else:
+                self._vectors[rows_arr] = vectors
+            self._alive[rows_arr] = True
+
+            records = []
+            for row, doc_id, text, metadata in zip(rows, ids, texts, metadatas):
+                if row >= len(self._ids):
+                    self._ids.append(doc_id)
+                    self._texts.append(text)
+                    self._metadatas.append(metadata)
+                else:
+                    self._ids[row], self._texts[row], self._metadatas[row] = doc_id, text, metadata
+                self._row_by_id[doc_id] = row
+                records.append({"row": row, "id": doc_id, "text": text, "metadata": metadata})
+            self._count += new_rows
+
+            if self.persist_directory:
+                self._vectors.flush()
+                if self._scales is not None:
+                    self._scales.flush()
+            self._append_log(records)
+        return ids
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        if not texts:
+            return []
+        embeddings = self._embedding.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, metadatas=metadatas, ids=ids)
+
+    def delete(self, ids=None, **kwargs):
+        if not ids:
+            return False
+        with self._lock:
+            records = []
+            for doc_id in ids:
+                row = self._row_by_id.pop(doc_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    records.append({"row": row, "id": doc_id, "deleted": True})
+            self._append_log(records)
+        return bool(records)
+
+    def get_by_ids(self, ids):
+        with self._lock:
+            return [
+                Document(id=doc_id, page_content=self._texts[row], metadata=self._metadatas[row])
+                for doc_id in ids
+                if (row := self._row_by_id.get(doc_id)) is not None
+            ]
+
+    # ----------------------------
+    # Search
+    # ----------------------------
+    def _scores(self, query: np.ndarray) -> np.ndarray:
+        n = self._count
+        if self.quantize:
+            scores = np.empty(n, dtype=np.float32)
+            for start in range(0, n, _SEARCH_BLOCK_ROWS):
+                end = min(start + _SEARCH_BLOCK_ROWS, n)
+                block = self._vectors[start:end].astype(np.float32)
+                scores[start:end] = (block @ query) * self._scales[start:end]
+        else:
+            scores = self._vectors[:n] @ query
+        scores[~self._alive[:n]] = -np.inf
+        return scores
+
+    def similarity_search_with_score_by_vector(self, embedding, k: int = 4, filter: dict = None, **kwargs):
+        with self._lock:
+            if k <= 0 or not self._count:
+                return []
+            query = _normalize(np.asarray(embedding, dtype=np.float32).reshape(1, -1))[0]
+            scores = self._scores(query)
+
+            if filter:
+                for row in range(self._count):
+                    metadata = self._metadatas[row]
+                    if any(metadata.get(key) != value for key, value in filter.items()):
+                        scores[row] = -np.inf
+
+            k = min(k, self._count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (Document(id=self._ids[row], page_content=self._texts[row], metadata=self._metadatas[row]),
+                 float(scores[row]))
+                for row in top
+                if np.isfinite(scores[row])
+            ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        embedding = self._embedding.embed_query(query)
+        return self.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are already cosine similarities.
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
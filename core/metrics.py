@@ -0,0 +1,230 @@
+import os
+import time
+import uuid
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+# ============================
+# Latency metrics and request tracing
+# ============================
+# Every stage (retrieval, LLM calls, tools, OCR, PDF parsing, scraping, TTS,
+# STT, content-growth stages) records into one Prometheus histogram labelled
+# by stage and name; failures also count in an error counter. /metrics
+# exposes them. Each HTTP request gets a trace ID (X-Request-ID if the client
+# sent one) that tags its log lines (everything logged through `log`, the
+# "coach" logger), and its stage timings are summed into a single access-log
+# line when it finishes. Work sent to the worker process pools runs through
+# traced_call(), which returns the worker's timings so the parent records them.
+
+METRICS_LOG_LEVEL = os.getenv("METRICS_LOG_LEVEL", "INFO").upper()
+TRACE_HEADER = "X-Request-ID"
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 45, 90, 180)
+
+STAGE_SECONDS = Histogram(
+    "coach_stage_duration_seconds", "Time spent per pipeline stage.", ["stage", "name"], buckets=_BUCKETS
+)
+STAGE_ERRORS = Counter("coach_stage_errors_total", "Pipeline stage failures.", ["stage", "name"])
+REQUEST_SECONDS = Histogram(
+    "coach_request_duration_seconds", "HTTP request latency.", ["method", "endpoint", "status"], buckets=_BUCKETS
+)
+
+_trace_id = contextvars.ContextVar("trace_id", default="-")
+_trace_stages = contextvars.ContextVar("trace_stages", default=None)
+_captured = contextvars.ContextVar("captured_stages", default=None)
+
+
+class _TraceFilter(logging.Filter):
+    def filter(self, record):
+        record.trace_id = _trace_id.get()
+        return True
+
+
+log = logging.getLogger("coach")
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [trace=%(trace_id)s] %(message)s"))
+    _handler.addFilter(_TraceFilter())
+    log.addHandler(_handler)
+    log.setLevel(METRICS_LOG_LEVEL)
+    log.propagate = False
+
+
+def current_trace_id() -> str:
+    return _trace_id.get()
+
+
+def start_trace(trace_id: str = None):
+    """
+    Starts a request trace in the current context; returns (trace_id, tokens
+    to pass to end_trace). Inside an existing trace (the Flask app mounted
+    under the ASGI app) the outer trace is reused and tokens is None.
+    """
+    if _trace_stages.get() is not None:
+        return _trace_id.get(), None
+    trace_id = (trace_id or "").strip()[:64] or uuid.uuid4().hex[:16]
+    return trace_id, (_trace_id.set(trace_id), _trace_stages.set([]))
+
+
+def end_trace(tokens, method: str, endpoint: str, status, elapsed: float):
+    """Records the request latency and logs one line with its stage breakdown."""
+    if tokens is None:
+        return
+    REQUEST_SECONDS.labels(method, endpoint or "unknown", str(status)).observe(elapsed)
+    stages = _trace_stages.get() or []
+    totals = {}
+    for stage, seconds in list(stages):
+        count, total = totals.get(stage, (0, 0.0))
+        totals[stage] = (count + 1, total + seconds)
+    breakdown = " ".join(f"{stage}={total:.3f}s×{count}" for stage, (count, total) in sorted(totals.items()))
+    log.info("%s %s %s %.3fs%s", method, endpoint, status, elapsed, f" {breakdown}" if breakdown else "")
+    trace_token, stages_token = tokens
+    _trace_stages.reset(stages_token)
+    _trace_id.reset(trace_token)
+
+
+def record(stage: str, name: str, seconds: float, error: bool = False):
+    STAGE_SECONDS.labels(stage, name).observe(seconds)
+    if error:
+        STAGE_ERRORS.labels(stage, name).inc()
+    captured = _captured.get()
+    if captured is not None:
+        captured.append((stage, name, seconds, error))
+    stages = _trace_stages.get()
+    if stages is not None:
+        stages.append((stage if not name else f"{stage}:{name}", seconds))
+
+
+@contextmanager
+def timed(stage: str, name: str = ""):
+    """`with timed("retrieval"):` records the block's duration (and failure) for stage/name."""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        record(stage, name, time.perf_counter() - started, failed)
+
+
+def instrumented(stage: str, name: str = ""):
+    """Decorator form of timed() for plain and async functions."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage, name or fn.__name__):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage, name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_iter(iterable, stage: str, name: str = ""):
+    """Yields from iterable, recording only the time spent producing items (e.g. PDF pages)."""
+    spent = 0.0
+    failed = False
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                spent += time.perf_counter() - started
+                break
+            except BaseException:
+                spent += time.perf_counter() - started
+                failed = True
+                raise
+            spent += time.perf_counter() - started
+            yield item
+    finally:
+        record(stage, name, spent, failed)
+
+
+def in_context(fn):
+    """Wraps fn to run in a copy of the caller's context, so worker threads keep the trace ID."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        # A Context can only be entered by one thread at a time; the copy still
+        # shares the trace's stage list
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def traced_call(trace_id: str, fn, *args):
+    """
+    Runs fn(*args) in a pool worker process under the parent's trace ID and
+    returns (result, timings). A worker's own metrics never reach /metrics,
+    so the parent passes the timings to replay().
+    """
+    tokens = (_trace_id.set(trace_id), _captured.set([]))
+    try:
+        return fn(*args), _captured.get()
+    finally:
+        _captured.reset(tokens[1])
+        _trace_id.reset(tokens[0])
+
+
+def replay(timings):
+    """Records stage timings returned by traced_call() in this process and trace."""
+    for stage, name, seconds, error in timings:
+        record(stage, name, seconds, error)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """Times every chat/LLM call made through LangChain (stage "llm", name = model)."""
+
+    def __init__(self):
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model_name") or params.get("model") or "llm"
+        with self._lock:
+            self._started[run_id] = (model, time.perf_counter())
+
+    def _finish(self, run_id, error: bool):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started:
+            model, at = started
+            record("llm", model, time.perf_counter() - at, error)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, False)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, True)
+
+
+llm_metrics = LLMMetricsHandler()
+
+
+def metrics_response():
+    """(body, content type) for a Prometheus scrape."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+
+from core.ocr_preprocess import tesseract_cmd
+
+# ============================
+# OCR engines
+# ============================
+# "tesserocr" keeps a pool of initialised Tesseract API handles in-process and
+# passes images in memory; each handle serves one image at a time. Without
+# tesserocr installed, "pytesseract" runs the tesseract CLI per image (a new
+# process and temp files every call), capped at the same concurrency.
+
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto").lower()
+OCR_POOL_SIZE = int(os.getenv("OCR_POOL_SIZE", str(os.cpu_count() or 1)))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+# Handles opened when the pool is built (each loads its own language model);
+# the rest are opened on demand up to OCR_POOL_SIZE
+OCR_POOL_PRELOAD = int(os.getenv("OCR_POOL_PRELOAD", "1"))
+
+
+class TesserocrPool:
+    """
+    Long-lived PyTessBaseAPI handles: `preload` opened up front (which also
+    proves the language data loads), more on demand up to `size`.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, size: int = OCR_POOL_SIZE, lang: str = OCR_LANG, preload: int = OCR_POOL_PRELOAD):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self.size = max(1, size)
+        self.lang = lang
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        try:
+            for _ in range(min(max(1, preload), self.size)):
+                self._idle.put(self._new_api())
+                self._created += 1
+        except Exception:
+            self.close()
+            raise
+
+    def _new_api(self):
+        return self._tesserocr.PyTessBaseAPI(lang=self.lang, psm=self._tesserocr.PSM.SINGLE_BLOCK)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._new_api()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def image_to_text(self, img) -> str:
+        api = self._acquire()
+        try:
+            api.SetImage(img)
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+            self._idle.put(api)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().End()
+            except queue.Empty:
+                break
+
+
+class PytesseractEngine:
+    """Fallback: one tesseract subprocess per image, at most `size` at a time."""
+
+    name = "pytesseract"
+
+    def __init__(self, size: int = OCR_POOL_SIZE, lang: str = OCR_LANG):
+        import pytesseract
+
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd()
+        self._pytesseract = pytesseract
+        self.size = max(1, size)
+        self.lang = lang
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def image_to_text(self, img) -> str:
+        with self._slots:
+            return self._pytesseract.image_to_string(img, lang=self.lang, config="--psm 6")
+
+    def close(self):
+        pass
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def create_ocr_engine(engine: str = None, size: int = OCR_POOL_SIZE):
+    """
+    Builds the requested engine; "auto" prefers tesserocr and falls back to
+    pytesseract when it is not installed or cannot open a handle (missing
+    tessdata, bad TESSDATA_PREFIX).
+    """
+    engine = (engine or OCR_ENGINE).lower()
+    if engine in ("auto", "tesserocr"):
+        try:
+            return TesserocrPool(size)
+        except ImportError:
+            if engine == "tesserocr":
+                raise
+            print("⚠️ tesserocr not installed, using pytesseract (one process per image).")
+        except RuntimeError as e:
+            if engine == "tesserocr":
+                raise
+            print(f"⚠️ tesserocr could not start ({e}), using pytesseract (one process per image).")
+    return PytesseractEngine(size)
+
+
+def init_worker_engine(size: int = 1):
+    """Process-pool initializer: a forked worker gets its own engine (handles are not fork-safe)."""
+    global _engine, _engine_lock
+    _engine_lock = threading.Lock()
+    _engine = create_ocr_engine(size=size)
+
+
+def get_ocr_engine():
+    """The process-wide OCR engine, created on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_ocr_engine()
+        return _engine
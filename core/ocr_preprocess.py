@@ -0,0 +1,148 @@
+import os
+import io
+import sys
+import hashlib
+
+import numpy as np
+
+# ============================
+# Screenshot preprocessing for OCR
+# ============================
+# Phone screenshots are downscaled to a width Tesseract reads well, binarised
+# with a vectorised Otsu threshold (dark text on a light background, whatever
+# the theme), and cropped to the rows that look like text lines, so photos,
+# video frames and empty space never reach the OCR engine.
+
+OCR_MAX_WIDTH = int(os.getenv("OCR_MAX_WIDTH", "1280"))
+OCR_CROP_BANDS = os.getenv("OCR_CROP_BANDS", "true").lower() == "true"
+TESSERACT_CMD = os.getenv("TESSERACT_CMD")
+_WINDOWS_TESSERACT = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+# A text line alternates ink/background a handful of times per row; photos and
+# gradients alternate far more often once thresholded.
+_MIN_TRANSITIONS = 4
+_MAX_TRANSITION_RATIO = 0.25
+_MIN_BAND_HEIGHT = 6
+_MAX_BAND_HEIGHT = 160
+_BAND_GAP = 3
+_BAND_PADDING = 8
+
+
+def tesseract_cmd():
+    """TESSERACT_CMD if set, the default Windows install path on Windows, else `tesseract` on PATH."""
+    if TESSERACT_CMD:
+        return TESSERACT_CMD
+    if sys.platform == "win32" and os.path.exists(_WINDOWS_TESSERACT):
+        return _WINDOWS_TESSERACT
+    return "tesseract"
+
+
+def read_image_bytes(image_file) -> bytes:
+    """Raw bytes of a path, bytes or file-like upload (rewound afterwards)."""
+    if isinstance(image_file, (bytes, bytearray, memoryview)):
+        return bytes(image_file)
+    if isinstance(image_file, (str, os.PathLike)):
+        with open(image_file, "rb") as f:
+            return f.read()
+    data = image_file.read()
+    if hasattr(image_file, "seek"):
+        image_file.seek(0)
+    return data
+
+
+def image_key(data: bytes) -> str:
+    """Content hash used to cache OCR results per screenshot."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_grayscale(data: bytes, max_width: int = OCR_MAX_WIDTH):
+    """Decodes and converts to grayscale, downscaling wide screenshots (PIL resize runs in C)."""
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    img.draft("L", (max_width, max_width * 4))  # lets JPEG decode at reduced size
+    img = img.convert("L")
+    if max_width and img.width > max_width:
+        height = round(img.height * max_width / img.width)
+        img = img.resize((max_width, height), Image.LANCZOS)
+    return np.asarray(img, dtype=np.uint8)
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Otsu's threshold from the 256-bin histogram."""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if not total:
+        return 128
+    levels = np.arange(256, dtype=np.float64)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    mean_bg = np.cumsum(hist * levels)
+    mean_total = mean_bg[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean_total * weight_bg - mean_bg * total) ** 2 / (weight_bg * weight_fg)
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between))
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Boolean ink mask; the minority side of the threshold is treated as text (handles dark mode)."""
+    ink = gray <= otsu_threshold(gray)
+    if ink.mean() > 0.5:
+        ink = ~ink
+    return ink
+
+
+def text_bands(ink: np.ndarray):
+    """(top, bottom) row ranges that look like lines of text."""
+    width = ink.shape[1]
+    transitions = np.count_nonzero(ink[:, 1:] != ink[:, :-1], axis=1)
+    is_text = (transitions >= _MIN_TRANSITIONS) & (transitions <= width * _MAX_TRANSITION_RATIO)
+
+    rows = np.flatnonzero(is_text)
+    if rows.size == 0:
+        return []
+    # Split where consecutive text rows are more than _BAND_GAP apart
+    breaks = np.flatnonzero(np.diff(rows) > _BAND_GAP)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]])) + 1
+    return [(int(top), int(bottom)) for top, bottom in zip(starts, ends)
+            if _MIN_BAND_HEIGHT <= bottom - top <= _MAX_BAND_HEIGHT]
+
+
+def crop_to_bands(ink: np.ndarray, bands) -> np.ndarray:
+    """Stacks the text bands (with a little padding) into one compact image."""
+    if not bands:
+        return ink
+    pad = np.zeros((_BAND_PADDING, ink.shape[1]), dtype=bool)
+    parts = [pad]
+    for top, bottom in bands:
+        parts.append(ink[max(0, top - 2):bottom + 2])
+        parts.append(pad)
+    stacked = np.vstack(parts)
+    # Trim the empty columns on either side as well
+    columns = np.flatnonzero(stacked.any(axis=0))
+    left = max(0, columns[0] - _BAND_PADDING)
+    right = min(stacked.shape[1], columns[-1] + 1 + _BAND_PADDING)
+    return stacked[:, left:right]
+
+
+def preprocess(data: bytes, crop: bool = OCR_CROP_BANDS, max_width: int = OCR_MAX_WIDTH):
+    """Returns a black-on-white PIL image ready for OCR."""
+    from PIL import Image
+
+    ink = binarize(load_grayscale(data, max_width))
+    if crop:
+        ink = crop_to_bands(ink, text_bands(ink))
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+
+
+def preprocess_legacy(data: bytes):
+    """The original chain: grayscale, invert if dark, contrast x2.5, sharpen, full resolution."""
+    from PIL import Image, ImageOps, ImageEnhance, ImageFilter
+
+    img = Image.open(io.BytesIO(data)).convert("L")
+    if img.getextrema()[1] < 128:
+        img = ImageOps.invert(img)
+    img = ImageEnhance.Contrast(img).enhance(2.5)
+    return img.filter(ImageFilter.SHARPEN)
@@ -0,0 +1,126 @@
+import os
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import fitz
+
+from core.metrics import current_trace_id, replay, timed, traced_call
+from core.worker_pools import get_pool, register_pool, reset_pool
+
+# ============================
+# PDF text extraction
+# ============================
+# PDFs are opened straight from memory (or from their path) and pages are
+# yielded in order as soon as they are extracted. Large documents are split
+# into page ranges extracted on the persistent "pdf" process pool (see
+# core/worker_pools.py). An upload is copied once into shared memory; each
+# worker opens a document on its first range and keeps it for the next ones,
+# so only text crosses the process boundary.
+
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Documents each worker keeps open between ranges
+_WORKER_DOCS = 2
+
+register_pool("pdf", PDF_WORKERS)
+
+_worker_docs = OrderedDict()
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
+def _worker_doc(source):
+    """The worker's open document for source: ("shm", name, size) or ("path", path, mtime)."""
+    doc = _worker_docs.get(source)
+    if doc is not None:
+        _worker_docs.move_to_end(source)
+        return doc
+    kind, ref, version = source
+    if kind == "shm":
+        block = shared_memory.SharedMemory(name=ref)
+        try:
+            doc = _open(bytes(block.buf[:version]))
+        finally:
+            block.close()
+    else:
+        doc = _open(ref)
+    _worker_docs[source] = doc
+    while len(_worker_docs) > _WORKER_DOCS:
+        _worker_docs.popitem(last=False)[1].close()
+    return doc
+
+
+def _extract_range(source, start: int, end: int):
+    with timed("pdf_parse", "worker"):
+        doc = _worker_doc(source)
+        return [doc[number].get_text() for number in range(start, end)]
+
+
+def load_pdf_source(file):
+    """Returns a path or the raw bytes of an uploaded PDF, without temp-file copies."""
+    if isinstance(file, (str, os.PathLike)):
+        return os.fspath(file)
+    if isinstance(file, (bytes, bytearray, memoryview)):
+        return bytes(file)
+    data = file.read()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return data
+
+
+def iter_pdf_pages(file, workers: int = PDF_WORKERS, parallel_min_pages: int = PDF_PARALLEL_MIN_PAGES,
+                   pages_per_task: int = PDF_PAGES_PER_TASK):
+    """
+    Yields the text of each page in order. `file` may be a path, raw bytes or a
+    file-like upload. Documents with at least `parallel_min_pages` pages are
+    extracted on the "pdf" pool (PDF_WORKERS processes) with at most
+    2 × `workers` ranges queued, so memory stays flat; `workers` <= 1 extracts
+    in this process.
+    """
+    source = load_pdf_source(file)
+    with _open(source) as doc:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < parallel_min_pages:
+            for page in doc:
+                yield page.get_text()
+            return
+
+    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+    window = 2 * workers
+    block = None
+    if isinstance(source, bytes):
+        block = shared_memory.SharedMemory(create=True, size=len(source))
+        block.buf[:len(source)] = source
+        task_source = ("shm", block.name, len(source))
+    else:
+        # The modification time keeps a rewritten file from being served from a worker's open copy
+        task_source = ("path", source, os.stat(source).st_mtime_ns)
+    pool = get_pool("pdf")
+    trace_id = current_trace_id()
+    pending = []
+    try:
+        pending = [pool.submit(traced_call, trace_id, _extract_range, task_source, *page_range)
+                   for page_range in ranges[:window]]
+        next_range = len(pending)
+        while pending:
+            texts, timings = pending.pop(0).result()
+            replay(timings)
+            if next_range < len(ranges):
+                pending.append(pool.submit(traced_call, trace_id, _extract_range, task_source, *ranges[next_range]))
+                next_range += 1
+            yield from texts
+    except BrokenProcessPool:
+        reset_pool("pdf", pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+        if block is not None:
+            block.close()
+            block.unlink()
@@ -0,0 +1,58 @@
+import os
+import re
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# ============================
+# Query routing
+# ============================
+# Most chat turns are questions about ingested content or general creator
+# advice that no tool can improve. Those take the "direct" route: one
+# retrieval plus one LLM call. Only messages that look like they need a tool
+# (fresh news, web search, SEO/metrics analysis, speech, export, a URL) go
+# through the multi-step ReAct agent. QUERY_ROUTER=false sends everything
+# through the agent as before.
+
+QUERY_ROUTER = os.getenv("QUERY_ROUTER", "true").lower() == "true"
+
+ROUTE_DIRECT = "direct"
+ROUTE_AGENT = "agent"
+
+# Which tool a match points at is only informative; any match selects the agent
+TOOL_PATTERNS = {
+    "search": re.compile(
+        r"\b(latest|breaking|news|headlines?|this (week|month)|right now|trending|search|google|look (it )?up|browse)\b"
+        r"|\b(today'?s|current|recent) (news|events|trends|updates|releases?)\b"
+    ),
+    "seo": re.compile(r"\bseo\b.*\b(analy[sz]e|analysis|audit|check|score)\b|\b(analy[sz]e|audit|check|score)\b.*\bseo\b"),
+    "analytics": re.compile(
+        r"\b\d[\d,.]*\s*k?\s*(likes|views|comments|shares|saves)\b"
+        r"|\banaly[sz]e\b.*\b(metrics|stats|analytics|engagement)\b"
+    ),
+    "social": re.compile(r"\boptimi[sz]e\b.*\b(caption|post|tweet|thread)\b"),
+    "speech": re.compile(r"\b(read (it|this|that) (aloud|out)|text[- ]to[- ]speech|say it out loud)\b"),
+    "export": re.compile(r"\b(export|save|download)\b.*\b(chat|conversation|pdf)\b"),
+    "url": re.compile(r"https?://"),
+}
+
+
+def route_query(text: str):
+    """(route, reason): ROUTE_AGENT with the matched tool family, else ROUTE_DIRECT."""
+    lowered = text.lower()
+    for reason, pattern in TOOL_PATTERNS.items():
+        if pattern.search(lowered):
+            return ROUTE_AGENT, reason
+    return ROUTE_DIRECT, None
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts LLM round trips made while handling one request."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self.calls += 1
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.calls += 1
@@ -1,63 +1,54 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
-from pinecone import Pinecone
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain_community.vectorstores import Pinecone as PineconeVectorStore
+from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import ConversationalRetrievalChain
 from langchain.memory import ConversationBufferWindowMemory
+from core.vector_backend import INDEX_NAME, get_vectorstore
+from core.embedding_cache import get_embeddings
+from core.summary_memory import RollingSummaryMemory
+from core.metrics import llm_metrics
 
 # ============================
 # Load environment variables
 # ============================
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-
-# Pinecone index details
-INDEX_NAME = "pinecone-db"
+# Rolling summary + recent turns under a token cap; "false" keeps the last 5 exchanges verbatim
+MEMORY_SUMMARY = os.getenv("MEMORY_SUMMARY", "true").lower() == "true"
 
 # ============================
-# Build RAG Pipeline
+# Conversation Memory
 # ============================
-def build_rag_pipeline(index_name: str = INDEX_NAME):
-    """Creates and returns the RAG components: chain, retriever, memory, llm."""
-
-    # 1️⃣ Initialize Pinecone client
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    index = pc.Index(index_name)
-    print(f"✅ Connected to Pinecone index: {index_name}")
-
-    # 2️⃣ Initialize Embeddings
-    embeddings = OpenAIEmbeddings(
-        model="text-embedding-3-large",
-        openai_api_key=OPENAI_API_KEY
-    )
-
-    # 3️⃣ Link Pinecone index with LangChain
-    vectorstore = PineconeVectorStore(index, embeddings, text_key="text")
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
-    print("✅ Retriever initialized.")
-
-    # 4️⃣ Initialize LLM
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        temperature=0.2,
-        openai_api_key=OPENAI_API_KEY
-    )
-
-    # 5️⃣ Memory for conversation context
-    memory = ConversationBufferWindowMemory(
+@lru_cache(maxsize=1)
+def get_summary_llm():
+    """Non-streaming model used to fold old turns into the memory summary."""
+    return ChatOpenAI(model="gpt-4o-mini", temperature=0, openai_api_key=OPENAI_API_KEY, callbacks=[llm_metrics])
+
+
+def build_memory():
+    """Creates a fresh conversation memory (one per session)."""
+    if MEMORY_SUMMARY:
+        return RollingSummaryMemory(
+            llm=get_summary_llm(),
+            memory_key="chat_history",
+            return_messages=True
+        )
+    return ConversationBufferWindowMemory(
         memory_key="chat_history",
         return_messages=True,
         k=5
     )
 
-    # 6️⃣ Custom Prompt Template
-    prompt = PromptTemplate(
-        input_variables=["context", "question", "chat_history"],
-        template="""
+
+# ============================
+# Answer prompt (retrieval chain and the direct route)
+# ============================
+RAG_PROMPT = PromptTemplate(
+    input_variables=["context", "question", "chat_history"],
+    template="""
 You are an AI assistant specialized in helping AI-driven content creators 
 (YouTube, Instagram, blogs, social media, podcasts).
 
@@ -80,14 +71,43 @@ Question: {question}
 
 Answer (concise and structured):
 """
+)
+
+
+# ============================
+# Build RAG Pipeline
+# ============================
+def build_rag_pipeline(index_name: str = INDEX_NAME, backend: str = None):
+    """Creates and returns the RAG components: chain, retriever, memory, llm."""
+
+    # 1️⃣ Initialize Embeddings (shared, cached in memory + on disk)
+    embeddings = get_embeddings("text-embedding-3-large")
+
+    # 2️⃣ Connect the vector store (Pinecone or local index, see VECTOR_BACKEND)
+    vectorstore = get_vectorstore(embeddings, index_name=index_name, backend=backend)
+    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    print("✅ Retriever initialized.")
+
+    # 3️⃣ Initialize LLM
+    # streaming=True lets callbacks see tokens as they arrive (/agent_query_stream);
+    # llm_metrics times every call for /metrics
+    llm = ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0.2,
+        openai_api_key=OPENAI_API_KEY,
+        streaming=True,
+        callbacks=[llm_metrics]
     )
 
-    # 7️⃣ Build the Conversational Retrieval Chain
+    # 4️⃣ Memory for conversation context
+    memory = build_memory()
+
+    # 5️⃣ Build the Conversational Retrieval Chain
     conv_chain = ConversationalRetrievalChain.from_llm(
         llm=llm,
         retriever=retriever,
         memory=memory,
-        combine_docs_chain_kwargs={"prompt": prompt},
+        combine_docs_chain_kwargs={"prompt": RAG_PROMPT},
         return_source_documents=True,
         output_key="output",
         verbose=False
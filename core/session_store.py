@@ -0,0 +1,157 @@
+import os
+import re
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+# ============================
+# Per-session conversation state
+# ============================
+# Each browser/API client gets its own memory, agent and ingested context.
+# Sessions are kept in LRU order and evicted when idle for too long, when
+# there are too many, or when their combined size exceeds a hard cap.
+
+SESSION_COOKIE = "coach_session"
+SESSION_HEADER = "X-Session-ID"
+SESSION_MAX = int(os.getenv("SESSION_MAX", "5000"))
+SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+SESSION_MEMORY_CAP_MB = float(os.getenv("SESSION_MEMORY_CAP_MB", "256"))
+
+_VALID_ID = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    return bool(session_id) and bool(_VALID_ID.match(session_id))
+
+
+class Session:
+    """Conversation state for one client. Hold `lock` while running its agent."""
+
+    def __init__(self, session_id: str, memory_factory, agent_factory):
+        self.id = session_id
+        self.context = ""
+        self.lock = threading.Lock()
+        self.created = time.time()
+        self.last_seen = self.created
+        self.size = 0
+        self.transcript = []   # [{"user", "agent", "time"}] as shown to the user, for exports
+        self.uploads = False   # True once it ingested content of its own (searched by its direct route)
+        self._memory_factory = memory_factory
+        self._agent_factory = agent_factory
+        self._memory = None
+        self._agent = None
+
+    @property
+    def memory(self):
+        if self._memory is None:
+            self._memory = self._memory_factory()
+        return self._memory
+
+    @property
+    def agent(self):
+        if self._agent is None:
+            self._agent = self._agent_factory(self.memory)
+        return self._agent
+
+    @asynccontextmanager
+    async def alock(self, poll: float = 0.02):
+        """
+        `async with session.alock():` is the ASGI counterpart of `with session.lock:`.
+        Polls instead of blocking so the event loop keeps running (and a
+        cancelled request never leaves the lock held).
+        """
+        while not self.lock.acquire(blocking=False):
+            await asyncio.sleep(poll)
+        try:
+            yield
+        finally:
+            self.lock.release()
+
+    def record(self, user_text: str, reply: str):
+        """Appends one exchange to the transcript (the question as typed, not the built prompt)."""
+        self.transcript.append({"user": user_text, "agent": reply, "time": time.time()})
+
+    def approx_bytes(self) -> int:
+        """Rough footprint: ingested context, transcript and chat history text."""
+        size = len(self.context)
+        size += sum(len(item["user"]) + len(item["agent"]) for item in self.transcript)
+        if self._memory is not None:
+            for message in self._memory.chat_memory.messages:
+                size += len(str(message.content))
+        return size
+
+
+class SessionStore:
+    def __init__(self, memory_factory, agent_factory, max_sessions: int = SESSION_MAX,
+                 idle_ttl: float = SESSION_IDLE_TTL, memory_cap_mb: float = SESSION_MEMORY_CAP_MB):
+        self.memory_factory = memory_factory
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+        self._evicted = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, session_id: str):
+        session = self._sessions.pop(session_id)
+        self._total_bytes -= session.size
+        self._evicted += 1
+
+    def _evict(self, now: float):
+        # Least recently used first, so expired sessions sit at the front
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if (now - oldest.last_seen > self.idle_ttl
+                    or len(self._sessions) > self.max_sessions
+                    or self._total_bytes > self.memory_cap_bytes):
+                self._drop(oldest_id)
+            else:
+                break
+
+    def get(self, session_id: str) -> Session:
+        """Returns the session for `session_id`, creating it if unknown or evicted."""
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, self.memory_factory, self.agent_factory)
+                self._sessions[session_id] = session
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_seen = now
+            self._evict(now)
+            return session
+
+    def touch(self, session: Session):
+        """Re-measures a session after it changed and enforces the memory cap."""
+        with self._lock:
+            if self._sessions.get(session.id) is not session:
+                return
+            size = session.approx_bytes()
+            self._total_bytes += size - session.size
+            session.size = size
+            session.last_seen = time.time()
+            self._sessions.move_to_end(session.id)
+            self._evict(session.last_seen)
+
+    def remove(self, session_id: str):
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": len(self._sessions),
+                "approx_bytes": self._total_bytes,
+                "evicted": self._evicted,
+            }
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+# ============================
+# Single-flight de-duplication
+# ============================
+# Concurrent calls with the same key share one execution: the first caller
+# (the leader) runs the function, everyone arriving while it is in flight
+# waits for and receives the same result or exception.
+
+
+class SharedCallCancelled(Exception):
+    """A follower's shared call was cancelled before producing a result."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._async_calls)
+
+    def do(self, key, fn, timeout: float = None):
+        """
+        Runs fn() once per key at a time and returns its result. Followers wait
+        at most `timeout` seconds, then raise TimeoutError (the leader keeps
+        running) so the caller can fall back to its own execution.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError(f"single-flight wait for {key!r} timed out")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def ado(self, key, coro_fn, timeout: float = None):
+        """Async counterpart of do(): coro_fn() is awaited once per key at a time."""
+        with self._lock:
+            task = self._async_calls.get(key)
+            leader = task is None
+            if leader:
+                task = asyncio.ensure_future(coro_fn())
+                self._async_calls[key] = task
+                self.executions += 1
+                task.add_done_callback(lambda _: self._forget_async(key, task))
+            else:
+                self.shared += 1
+        # shield: a cancelled leader (client gone) or a cancelled / timed-out
+        # follower must not cancel the shared call
+        if leader:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise   # this follower itself was cancelled
+            raise SharedCallCancelled(f"single-flight call for {key!r} was cancelled") from None
+
+    def _forget_async(self, key, task):
+        with self._lock:
+            if self._async_calls.get(key) is task:
+                del self._async_calls[key]
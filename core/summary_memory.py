@@ -0,0 +1,155 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import SystemMessage, get_buffer_string
+from pydantic import PrivateAttr
+
+from core.chunking import count_tokens, truncate_tokens
+from core.metrics import in_context, log
+
+# ============================
+# Rolling summary memory
+# ============================
+# The newest turns are kept verbatim while they fit HISTORY_TOKEN_CAP (minus
+# the room reserved for the summary). Older turns leave the verbatim window
+# immediately, so the prompt never grows past the cap, and are folded into a
+# running summary by a background LLM call. A turn that has left the window
+# but is not yet summarised is simply absent for that one request.
+
+HISTORY_TOKEN_CAP = int(os.getenv("HISTORY_TOKEN_CAP", "1500"))
+HISTORY_SUMMARY_TOKENS = int(os.getenv("HISTORY_SUMMARY_TOKENS", "300"))
+MEMORY_SUMMARY_BACKGROUND = os.getenv("MEMORY_SUMMARY_BACKGROUND", "true").lower() == "true"
+MEMORY_SUMMARY_WORKERS = int(os.getenv("MEMORY_SUMMARY_WORKERS", "2"))
+# Unsummarised turns kept when the summariser keeps failing (oldest dropped first)
+_MAX_PENDING_MESSAGES = 40
+
+SUMMARY_PROMPT = """Progressively summarize the conversation between a content creator and their AI coach.
+Update the current summary with the new lines. Keep facts, goals, numbers, decisions and open questions;
+drop pleasantries and repeated advice. Answer with the new summary only, at most {words} words.
+
+Current summary:
+{summary}
+
+New lines:
+{new_lines}
+
+New summary:"""
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, MEMORY_SUMMARY_WORKERS), thread_name_prefix="memory-summary")
+        return _pool
+
+
+class RollingSummaryMemory(BaseChatMemory):
+    """Recent turns verbatim + a running summary of older ones, under `max_token_limit` tokens in total."""
+
+    llm: Any = None
+    memory_key: str = "chat_history"
+    max_token_limit: int = HISTORY_TOKEN_CAP
+    summary_token_limit: int = HISTORY_SUMMARY_TOKENS
+    background: bool = MEMORY_SUMMARY_BACKGROUND
+    summary: str = ""
+
+    _pending: list = PrivateAttr(default_factory=list)
+    _summarizing: bool = PrivateAttr(default=False)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def memory_variables(self) -> list:
+        return [self.memory_key]
+
+    @property
+    def buffer(self):
+        return self.load_memory_variables({})[self.memory_key]
+
+    def _recent_budget(self) -> int:
+        return self.max_token_limit - (self.summary_token_limit if self.summary or self._pending else 0)
+
+    def _prune(self):
+        """Moves the turns that no longer fit the verbatim window to the summariser."""
+        with self._lock:
+            messages = list(self.chat_memory.messages)
+            budget = self._recent_budget()
+            keep, used = len(messages), 0
+            for i in range(len(messages) - 1, -1, -1):
+                used += count_tokens(str(messages[i].content))
+                if used > budget and i < len(messages) - 1:
+                    break
+                keep = i
+            if keep == 0:
+                return
+            self._pending.extend(messages[:keep])
+            del self._pending[:-_MAX_PENDING_MESSAGES]
+            self.chat_memory.messages = messages[keep:]
+            start = not self._summarizing
+            self._summarizing = True
+        if start:
+            if self.background:
+                _get_pool().submit(in_context(self._summarize))
+            else:
+                self._summarize()
+
+    def _summarize(self):
+        """Folds pending turns into the summary; repeats while new turns keep arriving."""
+        while True:
+            with self._lock:
+                batch = list(self._pending)
+                summary = self.summary
+                if not batch or self.llm is None:
+                    self._summarizing = False
+                    return
+            prompt = SUMMARY_PROMPT.format(
+                words=int(self.summary_token_limit * 0.75),
+                summary=summary or "(none)",
+                new_lines=get_buffer_string(batch),
+            )
+            try:
+                response = self.llm.invoke(prompt)
+                new_summary = truncate_tokens(str(getattr(response, "content", response)).strip(), self.summary_token_limit)
+            except Exception as e:
+                log.error("❌ Memory summary failed: %s", e)
+                with self._lock:
+                    self._summarizing = False
+                return
+            with self._lock:
+                # clear() may have run meanwhile; only drop what was summarised
+                if self._pending[:len(batch)] == batch:
+                    del self._pending[:len(batch)]
+                    self.summary = new_summary
+
+    def load_memory_variables(self, inputs: dict) -> dict:
+        self._prune()
+        with self._lock:
+            messages = list(self.chat_memory.messages)
+            summary = self.summary
+        if messages:
+            # A single oversized turn is clipped rather than allowed to blow the cap
+            budget = self._recent_budget()
+            last = messages[-1]
+            if count_tokens(str(last.content)) > budget:
+                messages[-1] = last.__class__(content=truncate_tokens(str(last.content), budget))
+        if summary:
+            messages = [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] + messages
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages)}
+
+    def save_context(self, inputs: dict, outputs: dict) -> None:
+        super().save_context(inputs, outputs)
+        self._prune()
+
+    def clear(self) -> None:
+        super().clear()
+        with self._lock:
+            self._pending.clear()
+            self.summary = ""
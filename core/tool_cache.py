@@ -0,0 +1,146 @@
+import os
+import time
+import threading
+import functools
+import inspect
+from collections import OrderedDict
+
+from core.singleflight import SingleFlight
+
+# ============================
+# Result cache for search-style tools
+# ============================
+# Per-tool TTL + LRU cache keyed by the normalised query. Concurrent identical
+# queries are de-duplicated with single-flight, so a burst of agent steps
+# asking the same thing makes one outbound API call.
+
+TOOL_CACHE_MAX_ITEMS = int(os.getenv("TOOL_CACHE_MAX_ITEMS", "512"))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "900"))
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "300"))
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def normalize_query(query) -> str:
+    return " ".join(str(query).lower().split())
+
+
+def _cacheable(value) -> bool:
+    # Error strings from the tools ("❌ ...") are returned, not cached
+    return value is not None and not (isinstance(value, str) and value.startswith("❌"))
+
+
+class ToolCache:
+    """TTL + LRU cache with single-flight for one tool. Wrap its functions with `cache.wrap`."""
+
+    def __init__(self, name: str, ttl: float, max_items: int = TOOL_CACHE_MAX_ITEMS):
+        self.name = name
+        self.ttl = ttl
+        self.max_items = max_items
+        self._entries = OrderedDict()   # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._upstream = 0
+        with _registry_lock:
+            _registry[name] = self
+
+    def _fresh(self, key):
+        # Re-check without touching stats: an earlier flight may have just filled it
+        with self._lock:
+            entry = self._entries.get(key)
+            return (True, entry[0]) if entry and entry[1] > time.time() else (False, None)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return True, entry[0]
+            if entry:
+                del self._entries[key]
+            self._misses += 1
+            return False, None
+
+    def put(self, key, value):
+        if self.ttl <= 0 or not _cacheable(value):
+            return
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def wrap(self, fn):
+        """Caches fn(query) (sync or async); both variants of a tool can share one cache."""
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def cached_async(query, *args, **kwargs):
+                key = normalize_query(query)
+                hit, value = self.get(key)
+                if hit:
+                    return value
+
+                async def load():
+                    hit, value = self._fresh(key)
+                    if hit:
+                        return value
+                    self._upstream += 1
+                    value = await fn(query, *args, **kwargs)
+                    self.put(key, value)
+                    return value
+
+                return await self._flight.ado(key, load)
+
+            return cached_async
+
+        @functools.wraps(fn)
+        def cached(query, *args, **kwargs):
+            key = normalize_query(query)
+            hit, value = self.get(key)
+            if hit:
+                return value
+
+            def load():
+                hit, value = self._fresh(key)
+                if hit:
+                    return value
+                self._upstream += 1
+                value = fn(query, *args, **kwargs)
+                self.put(key, value)
+                return value
+
+            return self._flight.do(key, load)
+
+        return cached
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._flight.shared,
+                "upstream_calls": self._upstream,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def tool_cache_stats() -> dict:
+    """Stats for every tool cache created so far, by tool name."""
+    with _registry_lock:
+        caches = list(_registry.values())
+    return {cache.name: cache.stats() for cache in caches}
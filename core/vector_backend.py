@@ -0,0 +1,101 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# ============================
+# Load environment variables
+# ============================
+load_dotenv()
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+
+# Pinecone index details
+INDEX_NAME = "pinecone-db"
+EMBEDDING_DIM = 3072
+
+# "pinecone" (default) or "local" for the in-process NumPy index
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "vector_index")
+LOCAL_INDEX_QUANTIZE = os.getenv("LOCAL_INDEX_QUANTIZE", "false").lower() in ("1", "true", "yes")
+# Content uploaded through /ingest and /ingest_batch is kept apart from the
+# shared knowledge base the retriever answers from
+UPLOADS_NAMESPACE = os.getenv("UPLOADS_NAMESPACE", "uploads")
+
+_stores = {}           # (backend, index, namespace) -> (store, embeddings)
+_checked_indexes = set()
+_stores_lock = threading.Lock()
+
+
+def _ensure_pinecone_index(index_name: str):
+    """Creates the Pinecone index if missing (checked once per process)."""
+    from pinecone import Pinecone, ServerlessSpec
+
+    if index_name in _checked_indexes:
+        return
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    if index_name not in pc.list_indexes().names():
+        print(f"🆕 Creating Pinecone index: {index_name}")
+        pc.create_index(
+            name=index_name,
+            dimension=EMBEDDING_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+        )
+    _checked_indexes.add(index_name)
+
+
+def _build_pinecone_store(embeddings, index_name: str, namespace: str = None):
+    from pinecone import Pinecone
+    from langchain_community.vectorstores import Pinecone as PineconeVectorStore
+
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+    index = pc.Index(index_name)
+    print(f"✅ Connected to Pinecone index: {index_name}" + (f" (namespace {namespace})" if namespace else ""))
+    return PineconeVectorStore(index, embeddings, text_key="text", namespace=namespace)
+
+
+def _build_local_store(embeddings, index_name: str, namespace: str = None):
+    from core.local_vectorstore import LocalVectorStore
+
+    # A namespace is a separate set of index files
+    if namespace:
+        index_name = f"{index_name}.{namespace}"
+    store = LocalVectorStore(
+        embeddings,
+        persist_directory=LOCAL_INDEX_DIR or None,
+        index_name=index_name,
+        quantize=LOCAL_INDEX_QUANTIZE,
+    )
+    print(f"✅ Using local vector index: {index_name} ({LOCAL_INDEX_DIR or 'in-memory'})")
+    return store
+
+
+def get_vectorstore(embeddings, index_name: str = INDEX_NAME, backend: str = None, create_if_missing: bool = False,
+                    namespace: str = None):
+    """
+    Returns the shared LangChain vector store for `index_name` (and
+    `namespace`, None being the knowledge base). The backend is picked by
+    VECTOR_BACKEND unless given explicitly; one instance is kept per
+    (backend, index, namespace) so every caller sees the same local index.
+    Asking for that instance with different embeddings raises ValueError,
+    since its vectors were built with the first ones.
+    """
+    backend = (backend or VECTOR_BACKEND).lower()
+    key = (backend, index_name, namespace)
+    with _stores_lock:
+        if backend == "pinecone" and create_if_missing:
+            _ensure_pinecone_index(index_name)
+        if key in _stores:
+            store, store_embeddings = _stores[key]
+            if embeddings is not store_embeddings:
+                raise ValueError(
+                    f"Vector store {index_name!r} (namespace {namespace!r}) is already open with different embeddings"
+                )
+            return store
+        if backend == "local":
+            store = _build_local_store(embeddings, index_name, namespace)
+        elif backend == "pinecone":
+            store = _build_pinecone_store(embeddings, index_name, namespace)
+        else:
+            raise ValueError(f"Unknown vector backend: {backend}")
+        _stores[key] = (store, embeddings)
+    return store
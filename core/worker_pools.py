@@ -0,0 +1,68 @@
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+
+# ============================
+# Persistent worker process pools
+# ============================
+# CPU-bound work (PDF page extraction, batch OCR) runs on process pools that
+# live as long as the app. Forking a process that already runs threads can
+# leave a child stuck on a lock another thread held at fork time, so the web
+# app starts every registered pool at import, while it is still single
+# threaded, and requests only ever submit work. A pool whose worker died is
+# replaced on next use (the one case where a fork happens later).
+
+_specs = {}     # name -> (workers, initializer)
+_pools = {}
+_lock = threading.Lock()
+
+
+def pool_context():
+    """Multiprocessing context for the worker pools."""
+    # Workers must not re-import the web app, which spawn/forkserver would do.
+    if sys.platform != "win32":
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+
+def register_pool(name: str, workers: int, initializer=None):
+    """Declares a pool; modules call this at import and start_pools() creates it."""
+    _specs[name] = (max(1, workers), initializer)
+
+
+def _create(name: str) -> ProcessPoolExecutor:
+    workers, initializer = _specs[name]
+    if sys.platform != "win32":
+        # Workers share the parent's tracker, so shared memory they attach to is not reported as leaked
+        resource_tracker.ensure_running()
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=pool_context(), initializer=initializer)
+    # With "fork" all workers are started by the first submit, so do that now
+    pool.submit(int).result()
+    return pool
+
+
+def start_pools():
+    """Starts every registered pool. Call before serving requests (app.py does, at import)."""
+    with _lock:
+        for name in _specs:
+            if name not in _pools:
+                _pools[name] = _create(name)
+
+
+def get_pool(name: str) -> ProcessPoolExecutor:
+    """The running pool `name`, started here if start_pools() was not called (CLI, scripts)."""
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = _create(name)
+        return pool
+
+
+def reset_pool(name: str, pool: ProcessPoolExecutor):
+    """Drops a pool that raised BrokenProcessPool so the next get_pool() starts a new one."""
+    with _lock:
+        if _pools.get(name) is pool:
+            del _pools[name]
+    pool.shutdown(wait=False, cancel_futures=True)
@@ -1,20 +1,374 @@
-from core.rag_pipeline import build_rag_pipeline
+import os
+import asyncio
+from contextlib import nullcontext
+from core.rag_pipeline import build_rag_pipeline, build_memory
 from core.agent_controller import AgentController
+from core.answer_cache import AnswerCache, context_fingerprint, normalize_question
+from core.embedding_cache import get_embeddings
+from core.session_store import SessionStore
+from core.singleflight import SharedCallCancelled, SingleFlight
+from core.context_assembler import assemble_context
+from core.query_router import QUERY_ROUTER, ROUTE_AGENT, ROUTE_DIRECT, LLMCallCounter, route_query
+from core.intent_classifier import INTENT_CLASSIFIER, IntentClassifier
+from core.metrics import log
 
 # Initialize RAG pipeline
 chain, retriever, memory, llm = build_rag_pipeline()
-agent = AgentController(llm=llm, memory=memory)
+agent = AgentController(llm=llm, memory=memory, retriever=retriever)
 
-def run_text_agent(user_input: str) -> str:
+# Per-client memory + agent + ingested context (the web app uses these)
+sessions = SessionStore(
+    memory_factory=build_memory,
+    agent_factory=lambda session_memory: AgentController(llm=llm, memory=session_memory, retriever=retriever),
+)
+
+# Greetings, thanks and other trivial messages are answered without the LLM
+intents = IntentClassifier()
+
+# Final answers keyed by question + ingested context (+ session once it has history)
+answer_cache = AnswerCache(embeddings=get_embeddings())
+
+# Identical questions arriving while one is already running share that run.
+# Followers wait at most COALESCE_WAIT seconds, then run their own agent.
+COALESCE_WAIT = float(os.getenv("COALESCE_WAIT", "60"))
+in_flight = SingleFlight()
+
+
+def _flight_key(user_text: str, context_hash: str, scope: str = "") -> str:
+    # Same scope as the answer cache: a run that reads one session's history is never shared
+    return f"{scope}/{context_hash}:{normalize_question(user_text)}"
+
+
+def _cache_scope(session) -> str:
+    """
+    Answer-cache scope for a session's next question. Answers given with no chat
+    history and no uploads of the session's own depend only on the question and
+    context and are shared; otherwise they may draw on the conversation or the
+    session's uploads, so they stay with the session.
+    """
+    target = session.agent if session else agent
+    if not (session and session.uploads) and not target.has_history():
+        return ""
+    return session.id if session else "cli"
+
+
+def uploads_changed(session):
+    """
+    Called when content ingested by `session` was added or changed: its direct
+    route now also searches its uploads, and answers cached for it are dropped.
+    """
+    if not session.uploads:
+        from tools.ingest_tool import uploads_retriever
+        session.agent.uploads_retriever = uploads_retriever(session.id)
+        session.uploads = True
+    answer_cache.invalidate(scope=session.id)
+
+
+def clear_uploads(session):
+    """
+    Forgets the content `session` ingested: its chunks are deleted, its direct
+    route stops searching them and answers cached for it are dropped.
+    """
+    if session.uploads:
+        from tools.ingest_tool import delete_uploads
+        session.agent.uploads_retriever = None
+        session.uploads = False
+        try:
+            delete_uploads(session.id)
+        except Exception as e:
+            log.error("❌ Failed to delete uploaded chunks: %s", e)
+    answer_cache.invalidate(scope=session.id)
+
+
+def _meta(route: str, llm_calls: int = 0, cached: bool = False, coalesced: bool = False) -> dict:
+    return {"cached": cached, "coalesced": coalesced, "route": route, "llm_calls": llm_calls}
+
+
+def _local_answer(user_text: str):
+    """{"result", "meta"} for a trivial message answered locally, else None."""
+    if not INTENT_CLASSIFIER:
+        return None
+    intent = intents.classify(user_text)
+    if intent is None:
+        return None
+    return {"result": IntentClassifier.reply(intent), "meta": {**_meta("local"), "intent": intent}}
+
+
+def _plan(user_text: str):
+    """(route, reason) for a message; with the router off every message takes the agent route."""
+    if not QUERY_ROUTER:
+        return ROUTE_AGENT, None
+    return route_query(user_text)
+
+
+def _remember(session, user_text: str, reply: str):
+    """Records an exchange answered without running this session's agent (cache hit or shared run)."""
+    # Keep the conversation history consistent with what the user saw
+    if session:
+        with session.lock:
+            session.agent.add_to_memory(user_text, role="user")
+            session.agent.add_to_memory(reply, role="ai")
+        sessions.touch(session)
+    else:
+        agent.add_to_memory(user_text, role="user")
+        agent.add_to_memory(reply, role="ai")
+
+
+def _recorded(session, user_text: str, result: dict) -> dict:
+    """Adds the answered exchange to the session transcript (used by exports) and passes the result on."""
+    if session and result["result"]:
+        session.record(user_text, result["result"])
+    return result
+
+
+async def _aremember(session, user_text: str, reply: str):
+    if session:
+        async with session.alock():
+            session.agent.add_to_memory(user_text, role="user")
+            session.agent.add_to_memory(reply, role="ai")
+        sessions.touch(session)
+    else:
+        agent.add_to_memory(user_text, role="user")
+        agent.add_to_memory(reply, role="ai")
+
+def run_text_agent(user_input: str, session=None, callbacks=None) -> str:
     if not user_input.strip():
         return "❌ No input provided."
     try:
-        reply = agent.invoke(user_input)
+        if session is None:
+            return agent.invoke(user_input, callbacks=callbacks)
+        # One turn at a time per session; different sessions run concurrently
+        with session.lock:
+            reply = session.agent.invoke(user_input, callbacks=callbacks)
+        sessions.touch(session)
         return reply
     except Exception as e:
-        print("❌ Error in run_text_agent:", e)
+        log.error("❌ Error in run_text_agent: %s", e)
         return "❌ Something went wrong while processing your message."
 
+
+def run_direct(user_text: str, context: str = "", session=None, callbacks=None) -> str:
+    """The direct route (one retrieval + one LLM call) with the same per-session locking as run_text_agent."""
+    if session is None:
+        return agent.answer_direct(user_text, context, callbacks=callbacks)
+    with session.lock:
+        reply = session.agent.answer_direct(user_text, context, callbacks=callbacks)
+    sessions.touch(session)
+    return reply
+
+
+def _overhead(session) -> int:
+    """Prompt tokens taken by the agent that will answer (instructions, tools, memory)."""
+    return (session.agent if session else agent).overhead_tokens()
+
+
+def build_prompt(user_text: str, context: str = "", reserved_tokens: int = 0, allow_tools: bool = False) -> str:
+    """
+    Wraps the user question with the ingested content (or a no-context notice).
+    Long content is cut down to the passages most relevant to the question that
+    fit the token budget left after `reserved_tokens` (agent prompt + memory).
+    `allow_tools` drops the "do not call tools" instruction (routed agent turns).
+    """
+    no_tools = "" if allow_tools else "Do NOT call web search, speech-to-text, or any other tools.\n"
+    if context:
+        return (
+            f"You have access to the following ingested document or web content:\n\n"
+            f"{assemble_context(user_text, context, reserved_tokens=reserved_tokens)}\n\n"
+            f"Answer the user's question **using only this content**.\n"
+            f"{no_tools}\n"
+            f"User question: {user_text}"
+        )
+    if allow_tools:
+        return user_text
+    return (
+        f"{user_text}\n\n"
+        f"IMPORTANT: There is no ingested content available. Answer based on general knowledge only.\n"
+        f"{no_tools}".rstrip("\n")
+    )
+
+
+def _agent_prompt(user_text: str, context: str, session) -> str:
+    prompt = build_prompt(user_text, context, _overhead(session) if context else 0, allow_tools=QUERY_ROUTER)
+    log.info("🧩 Prompt sent to agent:\n%s", prompt[:500])
+    return prompt
+
+
+def answer_question(user_text: str, session=None) -> dict:
+    """
+    Answers a chat message for `session` (or the shared CLI agent), serving
+    repeats from the answer cache. Tool-free messages take the direct route,
+    the rest the ReAct agent. Returns {"result": reply, "meta": {...}}.
+    """
+    local = _local_answer(user_text)
+    if local:
+        _remember(session, user_text, local["result"])
+        return _recorded(session, user_text, local)
+
+    context = session.context if session else ""
+    context_hash = context_fingerprint(context)
+    scope = _cache_scope(session)
+    cached = answer_cache.get(user_text, context_hash, scope)
+    if cached is not None:
+        _remember(session, user_text, cached)
+        return _recorded(session, user_text, {"result": cached, "meta": _meta("cache", cached=True)})
+
+    route, reason = _plan(user_text)
+    counter = LLMCallCounter()
+    led = False
+
+    def run():
+        nonlocal led
+        led = True
+        if route == ROUTE_DIRECT:
+            log.info("🧭 Direct route: %s", user_text[:200])
+            reply = run_direct(user_text, context, session=session, callbacks=[counter])
+        else:
+            log.info("🧭 Agent route (%s)", reason or "router off")
+            reply = run_text_agent(_agent_prompt(user_text, context, session), session=session, callbacks=[counter])
+        if not reply.startswith("❌"):
+            answer_cache.put(user_text, context_hash, reply, scope)
+        return reply
+
+    try:
+        reply = in_flight.do(_flight_key(user_text, context_hash, scope), run, timeout=COALESCE_WAIT)
+    except TimeoutError:
+        reply = None
+    if led:
+        return _recorded(session, user_text, {"result": reply, "meta": _meta(route, counter.calls)})
+    if reply is None or reply.startswith("❌"):
+        # The shared run was too slow or failed: answer on our own
+        reply = run()
+        return _recorded(session, user_text, {"result": reply, "meta": _meta(route, counter.calls)})
+    _remember(session, user_text, reply)
+    return _recorded(session, user_text, {"result": reply, "meta": _meta(route, coalesced=True)})
+
+
+async def arun_text_agent(user_input: str, session=None, callbacks=None) -> str:
+    """Async run_text_agent for the ASGI app."""
+    if not user_input.strip():
+        return "❌ No input provided."
+    try:
+        if session is None:
+            return await agent.ainvoke(user_input, callbacks=callbacks)
+        async with session.alock():
+            reply = await session.agent.ainvoke(user_input, callbacks=callbacks)
+        sessions.touch(session)
+        return reply
+    except Exception as e:
+        log.error("❌ Error in arun_text_agent: %s", e)
+        return "❌ Something went wrong while processing your message."
+
+
+async def arun_direct(user_text: str, context: str = "", session=None, callbacks=None) -> str:
+    """Async run_direct for the ASGI app."""
+    if session is None:
+        return await agent.aanswer_direct(user_text, context, callbacks=callbacks)
+    async with session.alock():
+        reply = await session.agent.aanswer_direct(user_text, context, callbacks=callbacks)
+    sessions.touch(session)
+    return reply
+
+
+async def aanswer_question(user_text: str, session=None) -> dict:
+    """Async answer_question: same cache, routing and memory handling, LLM calls awaited."""
+    local = _local_answer(user_text)
+    if local:
+        await _aremember(session, user_text, local["result"])
+        return _recorded(session, user_text, local)
+
+    context = session.context if session else ""
+    context_hash = context_fingerprint(context)
+    scope = _cache_scope(session)
+    # Lookups may embed the question (semantic cache), so keep them off the event loop
+    cached = await asyncio.to_thread(answer_cache.get, user_text, context_hash, scope)
+    if cached is not None:
+        await _aremember(session, user_text, cached)
+        return _recorded(session, user_text, {"result": cached, "meta": _meta("cache", cached=True)})
+
+    route, reason = _plan(user_text)
+    counter = LLMCallCounter()
+    led = False
+
+    async def run():
+        nonlocal led
+        led = True
+        if route == ROUTE_DIRECT:
+            log.info("🧭 Direct route: %s", user_text[:200])
+            reply = await arun_direct(user_text, context, session=session, callbacks=[counter])
+        else:
+            log.info("🧭 Agent route (%s)", reason or "router off")
+            prompt = await asyncio.to_thread(_agent_prompt, user_text, context, session)
+            reply = await arun_text_agent(prompt, session=session, callbacks=[counter])
+        if not reply.startswith("❌"):
+            await asyncio.to_thread(answer_cache.put, user_text, context_hash, reply, scope)
+        return reply
+
+    try:
+        reply = await in_flight.ado(_flight_key(user_text, context_hash, scope), run, timeout=COALESCE_WAIT)
+    except (asyncio.TimeoutError, SharedCallCancelled):
+        # Too slow, or the shared run was cancelled: answer on our own below
+        reply = None
+    if led:
+        return _recorded(session, user_text, {"result": reply, "meta": _meta(route, counter.calls)})
+    if reply is None or reply.startswith("❌"):
+        reply = await run()
+        return _recorded(session, user_text, {"result": reply, "meta": _meta(route, counter.calls)})
+    await _aremember(session, user_text, reply)
+    return _recorded(session, user_text, {"result": reply, "meta": _meta(route, coalesced=True)})
+
+
+def stream_answer(user_text: str, session=None):
+    """
+    Streaming variant of answer_question: yields ("status" | "token", data)
+    events while the answer is generated, then ("done", {"result", "meta"}).
+    """
+    local = _local_answer(user_text)
+    if local:
+        _remember(session, user_text, local["result"])
+        yield "token", {"text": local["result"]}
+        yield "done", _recorded(session, user_text, local)
+        return
+
+    context = session.context if session else ""
+    context_hash = context_fingerprint(context)
+    target = session.agent if session else agent
+    lock = session.lock if session else nullcontext()
+    scope = _cache_scope(session)
+    cached = answer_cache.get(user_text, context_hash, scope)
+    if cached is not None:
+        _remember(session, user_text, cached)
+        yield "token", {"text": cached}
+        yield "done", _recorded(session, user_text, {"result": cached, "meta": _meta("cache", cached=True)})
+        return
+
+    route, reason = _plan(user_text)
+    counter = LLMCallCounter()
+    if route == ROUTE_DIRECT:
+        log.info("🧭 Direct route (stream): %s", user_text[:200])
+        events = lambda: target.stream_direct(user_text, context, callbacks=[counter])
+    else:
+        log.info("🧭 Agent route (%s, stream)", reason or "router off")
+        prompt = _agent_prompt(user_text, context, session)
+        events = lambda: target.stream(prompt, callbacks=[counter])
+
+    reply = None
+    failed = False
+    with lock:
+        for event, data in events():
+            if event == "done":
+                reply = data["result"]
+                failed = data.get("error", False)
+                break
+            yield event, data
+    if session:
+        sessions.touch(session)
+    # A reply cut off by an error is shown once but never cached
+    if reply and not failed and not reply.startswith("❌"):
+        answer_cache.put(user_text, context_hash, reply, scope)
+    result = {"result": reply or "❌ Something went wrong while processing your message.",
+              "meta": _meta(route, counter.calls)}
+    yield "done", _recorded(session, user_text, result)
+
 if __name__ == "__main__":
     while True:
         user_input = input("You: ")
@@ -23,29 +23,116 @@ document.addEventListener("DOMContentLoaded", () => {
     addMessage("user", text);
     userInput.value = "";
 
-    fetch("/agent_query", {
+    streamMessage(text).catch(() => sendMessageOnce(text));
+  }
+
+  // Plain request/response, used when streaming is unavailable
+  function sendMessageOnce(text, msgDiv) {
+    return fetch("/agent_query", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ text })
     })
       .then(res => res.json())
-      .then(data => addMessage("agent", data.result || "⚠️ No response from agent."))
-      .catch(() => addMessage("agent", "❌ Error contacting agent."));
+      .then(data => finishMessage(msgDiv, data.result || "⚠️ No response from agent."))
+      .catch(() => finishMessage(msgDiv, "❌ Error contacting agent."));
   }
 
-  function addMessage(sender, message) {
-    if (!chatBox) return;
+  // Renders the answer token by token from /agent_query_stream (Server-Sent Events)
+  async function streamMessage(text) {
+    const res = await fetch("/agent_query_stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ text })
+    });
+    if (!res.ok || !res.body || !res.body.getReader) throw new Error("Streaming unavailable");
+
+    const msgDiv = createMessageDiv("agent");
+    const statusEl = document.createElement("div");
+    statusEl.classList.add("agent-status");
+    statusEl.textContent = "⏳ Thinking...";
+    msgDiv.appendChild(statusEl);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "", answer = "", finished = false;
+
+    const handleEvent = (event, data) => {
+      if (event === "token") {
+        answer += data.text;
+        renderMessage(msgDiv, answer);
+      } else if (event === "status") {
+        if (answer) return;
+        statusEl.textContent = data.state === "start" ? `🔧 Using ${data.tool}...` : "⏳ Thinking...";
+        if (!msgDiv.contains(statusEl)) msgDiv.appendChild(statusEl);
+      } else if (event === "done" || event === "error") {
+        finished = true;
+        finishMessage(msgDiv, data.result || answer || "⚠️ No response from agent.");
+      }
+    };
+
+    try {
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const raw = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          let event = "message", data = "";
+          raw.split("\n").forEach(line => {
+            if (line.startsWith("event:")) event = line.slice(6).trim();
+            else if (line.startsWith("data:")) data += line.slice(5).trim();
+          });
+          if (data) handleEvent(event, JSON.parse(data));
+        }
+      }
+    } catch (err) {
+      console.error("Stream interrupted:", err);
+    }
 
-    const msgDiv = document.createElement("div");
-    msgDiv.classList.add(sender === "user" ? "user-msg" : "agent-msg");
-    msgDiv.innerHTML = message
+    // Stream ended early: keep what arrived, or ask again without streaming
+    if (!finished) {
+      if (answer) finishMessage(msgDiv, answer);
+      else await sendMessageOnce(text, msgDiv);
+    }
+  }
+
+  function formatMessage(message) {
+    return message
       .replace(/\n/g, "<br>")
       .replace(/\*\*(.*?)\*\*/g, "<strong>$1</strong>")
       .replace(/(\d+)\.\s/g, "<br><strong>$1.</strong> ");
+  }
+
+  function createMessageDiv(sender) {
+    const msgDiv = document.createElement("div");
+    msgDiv.classList.add(sender === "user" ? "user-msg" : "agent-msg");
+    if (chatBox) chatBox.appendChild(msgDiv);
+    return msgDiv;
+  }
 
-    chatBox.appendChild(msgDiv);
-    chatBox.scrollTop = chatBox.scrollHeight;
+  function renderMessage(msgDiv, message) {
+    msgDiv.innerHTML = formatMessage(message);
+    if (chatBox) chatBox.scrollTop = chatBox.scrollHeight;
+  }
 
+  // Final text of an agent reply: render it (in msgDiv if streaming started) and record it
+  function finishMessage(msgDiv, message) {
+    if (!msgDiv) return addMessage("agent", message);
+    renderMessage(msgDiv, message);
+    recordHistory("agent", message);
+  }
+
+  function addMessage(sender, message) {
+    if (!chatBox) return;
+
+    renderMessage(createMessageDiv(sender), message);
+    recordHistory(sender, message);
+  }
+
+  function recordHistory(sender, message) {
     // ------------------ PUSH TO CHAT HISTORY ------------------
     if (sender === "user") {
       window.chatHistory.push([message, ""]);
@@ -69,11 +156,22 @@ document.addEventListener("DOMContentLoaded", () => {
           return;
         }
 
-        const response = await fetch("/export_chat", {
-          method: "POST",
-          headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ chat_history: chatHistory })
-        });
+        // Rendered from the server's copy of this session's conversation
+        let response = await fetch("/export_chat?format=pdf", { method: "POST" });
+
+        if (response.status === 202) {
+          // Long conversation: rendered in the background, poll until it can be downloaded
+          const { job } = await response.json();
+          let status = job.status;
+          while (status === "running") {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const poll = await fetch(`/export_jobs/${job.id}`);
+            if (!poll.ok) throw new Error(`Server error: ${poll.status}`);
+            status = (await poll.json()).job.status;
+          }
+          if (status !== "ready") throw new Error(`Export ${status}`);
+          response = await fetch(`/export_jobs/${job.id}/download`);
+        }
 
         if (!response.ok) throw new Error(`Server error: ${response.status}`);
 
@@ -178,6 +276,7 @@ document.addEventListener("DOMContentLoaded", () => {
     clearChatBtn.addEventListener("click", () => {
       if (chatBox) chatBox.innerHTML = "";
       window.chatHistory = [];
+      fetch("/clear_chat", { method: "POST" }).catch(err => console.error(err));
     });
   } else console.warn("⚠️ Clear chat button not found!");
 
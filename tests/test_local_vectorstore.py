@@ -0,0 +1,114 @@
+import hashlib
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import core.vector_backend as vector_backend
+from core.local_vectorstore import LocalVectorStore
+
+# Offline tests for the local vector index (VECTOR_BACKEND=local): no OpenAI
+# or Pinecone calls, embeddings are deterministic bag-of-words vectors.
+
+DIM = 64
+
+
+class WordEmbeddings(Embeddings):
+    """Texts sharing words get similar vectors."""
+
+    def embed_query(self, text):
+        vector = np.zeros(DIM, dtype=np.float32)
+        for word in text.lower().split():
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % DIM] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+TEXTS = [
+    "youtube thumbnails drive clicks",
+    "instagram reels reach new followers",
+    "podcast episodes build loyal listeners",
+    "blog posts rank with good seo",
+]
+
+
+@pytest.fixture
+def embeddings():
+    return WordEmbeddings()
+
+
+@pytest.fixture(params=[False, True], ids=["float32", "int8"])
+def store(request, embeddings):
+    return LocalVectorStore.from_texts(TEXTS, embeddings, ids=[f"doc-{i}" for i in range(len(TEXTS))],
+                                       metadatas=[{"n": i} for i in range(len(TEXTS))], quantize=request.param)
+
+
+def test_top_hit_is_the_matching_text(store):
+    results = store.similarity_search_with_score("youtube thumbnails", k=2)
+    assert [doc.id for doc, _ in results][0] == "doc-0"
+    assert results[0][1] >= results[1][1]
+
+
+def test_k_larger_than_the_index_returns_everything(store):
+    assert len(store.similarity_search("seo", k=50)) == len(TEXTS)
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_non_positive_k_returns_nothing(store, k):
+    assert store.similarity_search("seo", k=k) == []
+
+
+def test_filter_and_delete(store):
+    assert [doc.id for doc in store.similarity_search("reels", k=4, filter={"n": 2})] == ["doc-2"]
+    store.delete(ids=["doc-1"])
+    assert "doc-1" not in [doc.id for doc in store.similarity_search("instagram reels", k=4)]
+    assert len(store) == len(TEXTS) - 1
+
+
+def test_same_id_overwrites(store):
+    store.add_texts(["tiktok trends change weekly"], ids=["doc-0"])
+    assert len(store) == len(TEXTS)
+    assert store.get_by_ids(["doc-0"])[0].page_content == "tiktok trends change weekly"
+
+
+def test_persisted_index_reloads(tmp_path, embeddings):
+    LocalVectorStore.from_texts(TEXTS, embeddings, ids=[f"doc-{i}" for i in range(len(TEXTS))],
+                                persist_directory=str(tmp_path), index_name="kb").delete(ids=["doc-3"])
+    reloaded = LocalVectorStore(embeddings, persist_directory=str(tmp_path), index_name="kb")
+    assert len(reloaded) == len(TEXTS) - 1
+    assert reloaded.similarity_search("podcast listeners", k=1)[0].id == "doc-2"
+
+
+def test_retriever_interface(store):
+    retriever = store.as_retriever(search_kwargs={"k": 1})
+    assert retriever.invoke("blog seo")[0].id == "doc-3"
+
+
+def test_get_vectorstore_rejects_other_embeddings(monkeypatch, embeddings):
+    monkeypatch.setattr(vector_backend, "LOCAL_INDEX_DIR", "")
+    monkeypatch.setattr(vector_backend, "_stores", {})
+    store = vector_backend.get_vectorstore(embeddings, index_name="kb", backend="local")
+    assert vector_backend.get_vectorstore(embeddings, index_name="kb", backend="local") is store
+    with pytest.raises(ValueError):
+        vector_backend.get_vectorstore(WordEmbeddings(), index_name="kb", backend="local")
+    assert vector_backend.get_vectorstore(WordEmbeddings(), index_name="kb", backend="local", namespace="uploads") is not store
+
+
+def test_rag_pipeline_runs_offline(monkeypatch, embeddings):
+    import core.rag_pipeline as rag_pipeline
+
+    monkeypatch.setattr(vector_backend, "LOCAL_INDEX_DIR", "")
+    monkeypatch.setattr(vector_backend, "_stores", {})
+    monkeypatch.setattr(rag_pipeline, "get_embeddings", lambda model: embeddings)
+    monkeypatch.setattr(rag_pipeline, "ChatOpenAI", lambda **kwargs: FakeListChatModel(responses=["- Post reels"]))
+    monkeypatch.setattr(rag_pipeline, "MEMORY_SUMMARY", False)
+    vector_backend.get_vectorstore(embeddings, index_name="kb", backend="local").add_texts(TEXTS)
+
+    chain, retriever, memory, llm = rag_pipeline.build_rag_pipeline(index_name="kb", backend="local")
+    result = chain.invoke({"question": "how do I reach new followers on instagram?"})
+
+    assert result["output"] == "- Post reels"
+    assert "instagram reels" in result["source_documents"][0].page_content
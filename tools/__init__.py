@@ -1,21 +1,83 @@
-from .tavily_search import search_tool
-from .ai_news import ai_news_tool
-from .tts_tool import tts_tool
-from .chat_exporter import chat_export_tool
-from .greeting import greeting_tool
-from .analytics_tool import analytics_tool
-from .seo_tool import seo_tool
-from .social_tool import social_tool
-from .content_growth import content_growth_tool
+from importlib import import_module
+from langchain.tools import Tool
+
+from core.metrics import timed
+
+# Tool metadata is declared here, and only here, so the agent can list every
+# tool without importing the tool modules; each module (and the API clients it
+# builds) is imported on the first call of one of its tools. The modules build
+# their own Tool objects from these entries with registered_tool().
+TOOL_SPECS = [
+    # (name, description, module, function, async function or None)
+    ("Google Search (Tavily)", "Searches the web for relevant info when context is insufficient.",
+     "tavily_search", "search_tavily", "asearch_tavily"),
+    ("Latest AI News", "Fetches recent AI-related news or updates using SerpAPI.",
+     "ai_news", "safe_news_search", "asafe_news_search"),
+    ("Text-to-Speech", "Converts text output of the agent to natural speech using OpenAI TTS.",
+     "tts_tool", "text_to_speech_live", "atext_to_speech_live"),
+    ("SaveChatPDF", "Exports chat history as PDF.",
+     "chat_exporter", "save_chat_as_pdf", None),
+    ("Greeting", "Responds in a friendly but professional manner to greetings like hi/hello/good morning/afternoon/evening/night.",
+     "greeting", "greet_user", None),
+    ("AnalyticsWithGPTAdvice", "Analyzes content engagement metrics and gives GPT advice.",
+     "analytics_tool", "analyze_metrics", "aanalyze_metrics"),
+    ("AdvancedSEOAnalyzer", "Analyzes content for SEO and suggests improvements.",
+     "seo_tool", "seo_analysis", "aseo_analysis"),
+    ("SocialMediaOptimizer", "Optimizes content for different social platforms.",
+     "social_tool", "social_media_optimizer", None),
+    ("ContentGrowthPro", "Offline content growth analysis using screenshots + caption.",
+     "content_growth", "content_growth_advanced", "acontent_growth_advanced"),
+]
+
+
+def registered_tool(module: str, func) -> Tool:
+    """Eager Tool for tools.<module>, named and described by its TOOL_SPECS entry."""
+    for name, description, spec_module, _, _ in TOOL_SPECS:
+        if spec_module == module:
+            return Tool(name=name, func=func, description=description)
+    raise KeyError(f"No TOOL_SPECS entry for tools.{module}")
+
+
+def _resolve(module: str, function: str):
+    return getattr(import_module(f"{__name__}.{module}"), function)
+
+
+def _lazy(module: str, function: str, tool: str = ""):
+    """Returns a callable that imports tools.<module> on first use; calls are timed as stage "tool"."""
+    target = None
+
+    def call(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = _resolve(module, function)
+        with timed("tool", tool or function):
+            return target(*args, **kwargs)
+
+    call.__name__ = function
+    return call
+
+
+def _lazy_async(module: str, function: str, tool: str = ""):
+    """Coroutine counterpart of _lazy, used by the agent's async runs (ASGI app)."""
+    target = None
+
+    async def acall(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = _resolve(module, function)
+        with timed("tool", tool or function):
+            return await target(*args, **kwargs)
+
+    acall.__name__ = function
+    return acall
+
 
 ALL_TOOLS = [
-    search_tool,
-    ai_news_tool,
-    tts_tool,
-    chat_export_tool,
-    greeting_tool,
-    analytics_tool,
-    seo_tool,
-    social_tool,
-    content_growth_tool
+    Tool(
+        name=name,
+        func=_lazy(module, function, name),
+        coroutine=_lazy_async(module, async_function, name) if async_function else None,
+        description=description,
+    )
+    for name, description, module, function, async_function in TOOL_SPECS
 ]
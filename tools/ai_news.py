@@ -1,15 +1,18 @@
-import os
-from langchain_community.utilities import SerpAPIWrapper
-from langchain.tools import Tool
+from functools import lru_cache
+from tools import registered_tool
 from config.key_manager import SERPAPI_API_KEY
+from core.tool_cache import ToolCache, NEWS_CACHE_TTL
 
-os.environ["SERPAPI_API_KEY"] = SERPAPI_API_KEY
-search = SerpAPIWrapper()
+_cache = ToolCache("ai_news", ttl=NEWS_CACHE_TTL)
 
-def safe_news_search(query: str) -> str:
-    if not query.strip():
-        return "❌ Empty query."
-    results = search.results(query)
+
+@lru_cache(maxsize=1)
+def get_search():
+    """Builds the SerpAPI wrapper on first use (passing the key, not mutating os.environ)."""
+    from langchain_community.utilities import SerpAPIWrapper
+    return SerpAPIWrapper(serpapi_api_key=SERPAPI_API_KEY)
+
+def _format_news(results: dict) -> str:
     organic = results.get("organic_results", [])
     if not organic:
         return "No news found."
@@ -18,8 +21,16 @@ def safe_news_search(query: str) -> str:
         summary.append(f"{i}. {r.get('title')} - {r.get('snippet')}")
     return "\n".join(summary)
 
-ai_news_tool = Tool(
-    name="Latest AI News",
-    func=safe_news_search,
-    description="Fetches recent AI-related news or updates using SerpAPI."
-)
+@_cache.wrap
+def safe_news_search(query: str) -> str:
+    if not query.strip():
+        return "❌ Empty query."
+    return _format_news(get_search().results(query))
+
+@_cache.wrap
+async def asafe_news_search(query: str) -> str:
+    if not query.strip():
+        return "❌ Empty query."
+    return _format_news(await get_search().aresults(query))
+
+ai_news_tool = registered_tool("ai_news", safe_news_search)
@@ -1,23 +1,100 @@
-from openai import OpenAI
-from langchain.tools import Tool
+import json
+from functools import lru_cache
+from tools import registered_tool
 from config.key_manager import OPENAI_API_KEY
 
-client = OpenAI(api_key=OPENAI_API_KEY)
 
-def analyze_metrics(data: dict) -> dict:
+@lru_cache(maxsize=1)
+def get_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+def engagement_rate(data: dict) -> float:
+    """(likes + comments + shares) / views, in percent."""
+    likes, comments, shares, views = (data.get(key) or 0 for key in ("likes", "comments", "shares", "views"))
+    return (likes + comments + shares) / max(views, 1) * 100
+
+def analyze_batch_metrics(summary: dict, captions=None) -> str:
+    """One LLM call of advice for a whole batch of posts (totals, averages, best/worst post)."""
+    captions = [c for c in (captions or []) if c]
+    prompt = f"""Analyze engagement data for a batch of {summary['posts']} social media posts:
+    Totals: {summary['totals']}
+    Averages per post: {summary['averages']}
+    Average engagement: {summary['engagement_rate']:.2f}%
+    Best post: {summary.get('best')}, weakest post: {summary.get('worst')}"""
+    if captions:
+        prompt += "\n    Captions:\n" + "\n".join(f"    - {c[:200]}" for c in captions[:20])
+    prompt += "\n    Provide 3–5 tips to improve performance across these posts."
+    resp = get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}]
+    )
+    return resp.choices[0].message.content
+
+def _metrics_prompt(data: dict):
     views, likes, comments, shares = map(data.get, ["views", "likes", "comments", "shares"])
     engagement = (likes + comments + shares) / max(views, 1) * 100
     prompt = f"""Analyze engagement data:
     Views: {views}, Likes: {likes}, Comments: {comments}, Shares: {shares}, Engagement: {engagement:.2f}%
     Provide 3–5 tips to improve performance."""
-    resp = client.chat.completions.create(
+    return prompt, engagement
+
+def analyze_metrics(data: dict) -> dict:
+    prompt, engagement = _metrics_prompt(data)
+    resp = get_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}]
     )
     return {"summary": f"Engagement rate: {engagement:.2f}%", "advice": resp.choices[0].message.content}
 
-analytics_tool = Tool(
-    name="AnalyticsWithGPTAdvice",
-    func=analyze_metrics,
-    description="Analyzes content engagement metrics and gives GPT advice."
-)
+async def aanalyze_metrics(data: dict) -> dict:
+    prompt, engagement = _metrics_prompt(data)
+    resp = await get_async_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}]
+    )
+    return {"summary": f"Engagement rate: {engagement:.2f}%", "advice": resp.choices[0].message.content}
+
+def _merged_prompt(data: dict, content: str):
+    prompt, engagement = _metrics_prompt(data)
+    prompt += f"""
+    Then SEO analyze this content: {content}
+    Reply with a JSON object: {{"advice": "<the tips>", "seo": "<the SEO analysis>"}}"""
+    return prompt, engagement
+
+def _merged_result(content: str, engagement: float) -> dict:
+    try:
+        parsed = json.loads(content)
+    except (TypeError, json.JSONDecodeError):
+        parsed = {"advice": content}
+    return {
+        "summary": f"Engagement rate: {engagement:.2f}%",
+        "advice": str(parsed.get("advice", "")),
+        "seo": str(parsed.get("seo", "")),
+    }
+
+def analyze_metrics_with_seo(data: dict, content: str) -> dict:
+    """Engagement advice and SEO analysis of `content` from one structured-output call."""
+    prompt, engagement = _merged_prompt(data, content)
+    resp = get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"}
+    )
+    return _merged_result(resp.choices[0].message.content, engagement)
+
+async def aanalyze_metrics_with_seo(data: dict, content: str) -> dict:
+    prompt, engagement = _merged_prompt(data, content)
+    resp = await get_async_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"}
+    )
+    return _merged_result(resp.choices[0].message.content, engagement)
+
+analytics_tool = registered_tool("analytics_tool", analyze_metrics)
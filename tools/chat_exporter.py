@@ -1,31 +1,16 @@
-from fpdf import FPDF
-from datetime import datetime
-from langchain.tools import Tool
+from tools import registered_tool
+from core.chat_export import export_filename, normalize_exchanges, write_pdf
 
 def save_chat_as_pdf(chat_history, filename_prefix="chat_export"):
-    if not chat_history:
+    exchanges = normalize_exchanges(chat_history) if isinstance(chat_history, list) else []
+    if not exchanges:
         return "❌ No chat to save."
 
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(0, 10, "Chat History", ln=True, align="C")
-
-    for i, (user_msg, agent_msg) in enumerate(chat_history, 1):
-        pdf.set_font("Arial", "B", 12)
-        pdf.cell(0, 8, f"--- Exchange {i} ---", ln=True)
-        pdf.set_font("Arial", "", 10)
-        pdf.multi_cell(0, 5, f"User: {user_msg}\n\nAgent: {agent_msg}\n\n")
-
-    fname = f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    pdf.output(fname)
+    fname = export_filename("pdf", filename_prefix)
+    write_pdf(exchanges, fname)
     return f"✅ Chat saved as {fname}"
 
-chat_export_tool = Tool(
-    name="SaveChatPDF",
-    func=save_chat_as_pdf,
-    description="Exports chat history as PDF."
-)
+chat_export_tool = registered_tool("chat_exporter", save_chat_as_pdf)
 
 
 print("✅ Chat exporter is ready!")
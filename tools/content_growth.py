@@ -1,88 +1,164 @@
-from langchain.tools import Tool
-from .analytics_tool import analyze_metrics
-from .seo_tool import seo_analysis
+from tools import registered_tool
+from .analytics_tool import (analyze_metrics, aanalyze_metrics, analyze_metrics_with_seo, aanalyze_metrics_with_seo,
+                             analyze_batch_metrics, engagement_rate)
+from .seo_tool import seo_analysis, aseo_analysis
 from .social_tool import social_media_optimizer
-from PIL import Image, ImageEnhance, ImageFilter
-import pytesseract
+import os
 import re
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from core.ocr_preprocess import OCR_CROP_BANDS, image_key, preprocess, read_image_bytes
+from core.ocr_engine import get_ocr_engine, init_worker_engine
+from core.metrics import current_trace_id, in_context, log, record, replay, timed, traced_call
+from core.worker_pools import get_pool, register_pool, reset_pool
+from core.tool_cache import ToolCache
+
+# Concurrent mode starts the SEO call alongside OCR and bounds every stage by a
+# timeout; merged mode asks for advice + SEO in one structured LLM call.
+CONTENT_GROWTH_CONCURRENT = os.getenv("CONTENT_GROWTH_CONCURRENT", "true").lower() == "true"
+CONTENT_GROWTH_MERGED_LLM = os.getenv("CONTENT_GROWTH_MERGED_LLM", "false").lower() == "true"
+CONTENT_GROWTH_OCR_TIMEOUT = float(os.getenv("CONTENT_GROWTH_OCR_TIMEOUT", "20"))
+CONTENT_GROWTH_LLM_TIMEOUT = float(os.getenv("CONTENT_GROWTH_LLM_TIMEOUT", "45"))
+CONTENT_GROWTH_WORKERS = int(os.getenv("CONTENT_GROWTH_WORKERS", "16"))
+OCR_CACHE_TTL = float(os.getenv("OCR_CACHE_TTL", "86400"))
+CONTENT_GROWTH_BATCH_WORKERS = int(os.getenv("CONTENT_GROWTH_BATCH_WORKERS", str(os.cpu_count() or 1)))
+CONTENT_GROWTH_BATCH_MAX_IMAGES = int(os.getenv("CONTENT_GROWTH_BATCH_MAX_IMAGES", "100"))
+METRIC_FIELDS = ("likes", "saves", "comments", "shares", "views")
+
+_ocr_cache = ToolCache("ocr_metrics", ttl=OCR_CACHE_TTL)
+# Batch OCR workers, forked once at startup (see core/worker_pools.py)
+register_pool("ocr", CONTENT_GROWTH_BATCH_WORKERS, initializer=init_worker_engine)
+
+_pool = None
+
+
+# Helper to parse numbers like 23,158 or 2.3K
+def parse_number(segment):
+    match = re.search(r"([\d,.]+)\s*(k|m)?", segment)
+    if not match:
+        return 0
+    try:
+        num = float(match.group(1).replace(",", ""))
+    except ValueError:
+        return 0
+    unit = match.group(2)
+    if unit == "k":
+        num *= 1_000
+    elif unit == "m":
+        num *= 1_000_000
+    return int(num)
+
+
+def parse_metrics(text: str) -> dict:
+    """Engagement metrics from OCR text, by keyword per line."""
+    metrics = {}
+    for line in text.lower().splitlines():
+        if "like" in line:
+            metrics["likes"] = parse_number(line)
+        elif "save" in line:
+            metrics["saves"] = parse_number(line)
+        elif "comment" in line:
+            metrics["comments"] = parse_number(line)
+        elif "share" in line:
+            metrics["shares"] = parse_number(line)
+        elif "view" in line:
+            metrics["views"] = parse_number(line)
+
+    # Fill missing ones
+    for key in ["likes", "saves", "comments", "shares", "views"]:
+        metrics.setdefault(key, 0)
+    return metrics
+
+
+def ocr_image(img) -> str:
+    """Text of a preprocessed image from the shared OCR engine pool (see core.ocr_engine)."""
+    return get_ocr_engine().image_to_text(img)
+
+
+def ocr_metrics(data: bytes) -> dict:
+    """Metrics from raw image bytes (no cache); also runs inside batch worker processes."""
+    with timed("ocr"):
+        metrics = parse_metrics(ocr_image(preprocess(data, crop=OCR_CROP_BANDS)))
+        if OCR_CROP_BANDS and not any(metrics.values()):
+            metrics = parse_metrics(ocr_image(preprocess(data, crop=False)))
+    return metrics
 
 
 def extract_metrics_from_image(image_file):
     """
     Extract engagement metrics from social media screenshot.
-    Enhanced to handle dark backgrounds (white text on black).
+    The image is downscaled, Otsu-binarised (dark mode included) and cropped to
+    its text lines before OCR; if the crop yields no metrics the whole
+    binarised image is read. Results are cached by image content hash.
     """
-    from PIL import Image, ImageOps, ImageEnhance, ImageFilter
-    import pytesseract, re
-
     try:
-        img = Image.open(image_file)
-
-        # 1️⃣ Convert to grayscale
-        img = img.convert("L")
-
-        # 2️⃣ Invert colors if background is dark
-        # (detect by checking average pixel brightness)
-        if img.getextrema()[1] < 128:  # if overall dark
-            img = ImageOps.invert(img)
-
-        # 3️⃣ Enhance contrast & sharpen
-        img = ImageEnhance.Contrast(img).enhance(2.5)
-        img = img.filter(ImageFilter.SHARPEN)
-
-        # 4️⃣ OCR to extract text
-        text = pytesseract.image_to_string(img, config="--psm 6").lower()
-        print("🔍 OCR Extracted Text:\n", text)
-
-        metrics = {}
-
-        # Helper to parse numbers like 23,158 or 2.3K
-        def parse_number(segment):
-            match = re.search(r"([\d,.]+)\s*(k|m)?", segment)
-            if not match:
-                return 0
-            num = float(match.group(1).replace(",", ""))
-            unit = match.group(2)
-            if unit == "k":
-                num *= 1_000
-            elif unit == "m":
-                num *= 1_000_000
-            return int(num)
-
-        # 5️⃣ Extract metrics by keyword
-        for line in text.splitlines():
-            if "like" in line:
-                metrics["likes"] = parse_number(line)
-            elif "save" in line:
-                metrics["saves"] = parse_number(line)
-            elif "comment" in line:
-                metrics["comments"] = parse_number(line)
-            elif "share" in line:
-                metrics["shares"] = parse_number(line)
-            elif "view" in line:
-                metrics["views"] = parse_number(line)
-
-        # Fill missing ones
-        for key in ["likes", "saves", "comments", "shares", "views"]:
-            metrics.setdefault(key, 0)
-
-        return metrics
+        data = read_image_bytes(image_file)
+        key = image_key(data)
+        hit, cached = _ocr_cache.get(key)
+        if hit:
+            return dict(cached)
+
+        metrics = ocr_metrics(data)
+        log.info("🔍 OCR metrics: %s", metrics)
+
+        _ocr_cache.put(key, metrics)
+        return dict(metrics)
 
     except Exception as e:
-        print("❌ OCR Error:", e)
+        log.error("❌ OCR Error: %s", e)
         return {"likes": 0, "saves": 0, "comments": 0, "shares": 0, "views": 0}
 
 
-def content_growth_advanced(post_url=None, screenshot=None, metrics=None, caption=""):
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=CONTENT_GROWTH_WORKERS, thread_name_prefix="content-growth")
+    return _pool
+
+
+def _wait(future, started: float, timeout: float, stage: str, default):
+    """Result of a stage started at `started`, or `default` if it failed or ran past its timeout."""
+    try:
+        value = future.result(timeout=max(0.0, started + timeout - time.monotonic()))
+    except FuturesTimeout:
+        log.warning("⏱️ %s timed out after %gs", stage, timeout)
+    except Exception as e:
+        log.error("❌ %s failed: %s", stage, e)
+    else:
+        record("content_growth", stage, time.monotonic() - started)
+        return value
+    record("content_growth", stage, time.monotonic() - started, error=True)
+    return default
+
+
+def _growth_report(final_metrics, result, seo_result, caption):
+    social_result = social_media_optimizer(caption) if caption else ""
+    return {
+        "metrics": final_metrics,
+        "advice": (result or {}).get("advice", "") or "No advice generated.",
+        "seo": seo_result or "No SEO analysis available.",
+        "social": social_result or "No social suggestions available."
+    }
+
+
+def content_growth_advanced(post_url=None, screenshot=None, metrics=None, caption="",
+                            concurrent: bool = None, merged: bool = None):
     """
     Offline content growth analysis using OCR + text-based reasoning.
+    concurrent / merged default to CONTENT_GROWTH_CONCURRENT / CONTENT_GROWTH_MERGED_LLM.
     """
+    concurrent = CONTENT_GROWTH_CONCURRENT if concurrent is None else concurrent
+    merged = (CONTENT_GROWTH_MERGED_LLM if merged is None else merged) and bool(caption)
     final_metrics = metrics or {}
 
+    if concurrent:
+        return _content_growth_concurrent(screenshot, final_metrics, caption, merged)
+
     # 1️⃣ Extract metrics from screenshot if provided
     if screenshot:
-        print("📸 Extracting metrics from screenshot...")
+        log.info("📸 Extracting metrics from screenshot...")
         img_metrics = extract_metrics_from_image(screenshot)
         final_metrics.update(img_metrics)
 
@@ -91,25 +167,202 @@ def content_growth_advanced(post_url=None, screenshot=None, metrics=None, captio
         final_metrics = {"likes": 0, "comments": 0, "shares": 0, "views": 0}
 
     # 3️⃣ Analyze with existing tools
-    result = analyze_metrics(final_metrics) or {}
-    advice = result.get("advice", "")
+    if merged:
+        result = analyze_metrics_with_seo(final_metrics, caption) or {}
+        seo_result = result.get("seo", "")
+    else:
+        result = analyze_metrics(final_metrics) or {}
+        seo_result = seo_analysis(caption) if caption else ""
 
-    seo_result = seo_analysis(caption) if caption else ""
-    social_result = social_media_optimizer(caption) if caption else ""
+    return _growth_report(final_metrics, result, seo_result, caption)
+
+
+def _content_growth_concurrent(screenshot, final_metrics, caption, merged):
+    """
+    OCR and the SEO call start together; the metrics advice follows OCR.
+    Latency is roughly max(OCR + advice, SEO) instead of their sum.
+    """
+    pool = _get_pool()
+    started = time.monotonic()
+    ocr = pool.submit(in_context(extract_metrics_from_image), screenshot) if screenshot else None
+    seo = pool.submit(in_context(seo_analysis), caption) if caption and not merged else None
+
+    if ocr:
+        log.info("📸 Extracting metrics from screenshot...")
+        final_metrics.update(_wait(ocr, started, CONTENT_GROWTH_OCR_TIMEOUT, "OCR", {}))
+    if not final_metrics:
+        final_metrics = {"likes": 0, "comments": 0, "shares": 0, "views": 0}
 
+    analysis_started = time.monotonic()
+    if merged:
+        analysis = pool.submit(in_context(analyze_metrics_with_seo), final_metrics, caption)
+    else:
+        analysis = pool.submit(in_context(analyze_metrics), final_metrics)
+    result = _wait(analysis, analysis_started, CONTENT_GROWTH_LLM_TIMEOUT, "Metrics analysis", {})
+
+    if merged:
+        seo_result = (result or {}).get("seo", "")
+    else:
+        seo_result = _wait(seo, started, CONTENT_GROWTH_LLM_TIMEOUT, "SEO analysis", "") if seo else ""
+
+    return _growth_report(final_metrics, result, seo_result, caption)
+
+
+def _ocr_task(data: bytes):
+    # Runs in a worker process; errors come back as text so one bad image doesn't sink the batch
+    try:
+        return ocr_metrics(data), None
+    except Exception as e:
+        return None, str(e)
+
+
+def _batch_summary(results) -> dict:
+    ok = [r for r in results if r["status"] == "ok"]
+    totals = {field: sum(r["metrics"].get(field, 0) for r in ok) for field in METRIC_FIELDS}
+    count = max(len(ok), 1)
+    ranked = sorted(ok, key=lambda r: r["engagement_rate"])
     return {
-        "metrics": final_metrics,
-        "advice": advice or "No advice generated.",
-        "seo": seo_result or "No SEO analysis available.",
-        "social": social_result or "No social suggestions available."
+        "posts": len(ok),
+        "failed": len(results) - len(ok),
+        "totals": totals,
+        "averages": {field: round(total / count, 1) for field, total in totals.items()},
+        "engagement_rate": round(sum(r["engagement_rate"] for r in ok) / count, 2),
+        "best": ranked[-1]["name"] if ranked else None,
+        "worst": ranked[0]["name"] if ranked else None,
     }
 
 
+def content_growth_batch(screenshots, captions=None, workers: int = None):
+    """
+    Batch analysis of many post screenshots. `screenshots` holds images (paths,
+    bytes or file-likes) or (name, image) pairs; `captions` optionally lines up
+    with them. OCR runs on the persistent "ocr" process pool (`workers` <= 1
+    runs it in this process) and one result per image is yielded as it
+    completes (cached images first), then a final {"status": "done"} record
+    with the aggregate metrics and a single LLM analysis of the batch.
+    """
+    workers = CONTENT_GROWTH_BATCH_WORKERS if workers is None else workers
+    captions = list(captions or [])
+    items = []
+    for index, shot in enumerate(screenshots):
+        name, image = shot if isinstance(shot, tuple) else (getattr(shot, "filename", None) or f"image-{index + 1}", shot)
+        caption = captions[index] if index < len(captions) else ""
+        items.append((index, name, read_image_bytes(image), caption or ""))
+
+    results = []
+
+    def finish(index, name, caption, metrics, error=None):
+        result = {"index": index, "name": name, "status": "error" if error else "ok", "caption": caption}
+        if error:
+            result["error"] = error
+        else:
+            result["metrics"] = metrics
+            result["engagement_rate"] = round(engagement_rate(metrics), 2)
+            result["social"] = social_media_optimizer(caption) if caption else ""
+        results.append(result)
+        return result
+
+    pending = []
+    for index, name, data, caption in items:
+        key = image_key(data)
+        hit, cached = _ocr_cache.get(key)
+        if hit:
+            yield finish(index, name, caption, dict(cached))
+        else:
+            pending.append((index, name, data, caption, key))
+
+    def _result(item, outcome):
+        index, name, _, caption, key = item
+        metrics, error = outcome
+        if error is None:
+            _ocr_cache.put(key, metrics)
+        return finish(index, name, caption, metrics, error)
+
+    if workers <= 1 or len(pending) < 2:
+        for item in pending:
+            yield _result(item, _ocr_task(item[2]))
+    else:
+        pool = get_pool("ocr")
+        trace_id = current_trace_id()
+        futures = {pool.submit(traced_call, trace_id, _ocr_task, item[2]): item for item in pending}
+        broken = False
+        try:
+            for future in as_completed(futures):
+                try:
+                    outcome, timings = future.result()
+                    replay(timings)
+                except BrokenProcessPool as e:
+                    broken = True
+                    outcome = (None, str(e))
+                except Exception as e:
+                    outcome = (None, str(e))
+                yield _result(futures[future], outcome)
+        finally:
+            # Client went away: drop the images nobody will see
+            for future in futures:
+                future.cancel()
+            if broken:
+                reset_pool("ocr", pool)
+
+    summary = _batch_summary(results)
+    advice = ""
+    if summary["posts"]:
+        try:
+            advice = analyze_batch_metrics(summary, [item[3] for item in items])
+        except Exception as e:
+            log.error("❌ Batch analysis failed: %s", e)
+    yield {"status": "done", "summary": summary, "advice": advice or "No advice generated."}
+
+
+async def _await_stage(awaitable, timeout: float, stage: str, default):
+    started = time.monotonic()
+    try:
+        value = await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        log.warning("⏱️ %s timed out after %gs", stage, timeout)
+    except Exception as e:
+        log.error("❌ %s failed: %s", stage, e)
+    else:
+        record("content_growth", stage, time.monotonic() - started)
+        return value
+    record("content_growth", stage, time.monotonic() - started, error=True)
+    return default
+
+
+async def acontent_growth_advanced(post_url=None, screenshot=None, metrics=None, caption="", merged: bool = None):
+    """
+    Async variant for the ASGI app: the SEO call runs while OCR (on a worker
+    thread) and then the metrics advice run, each bounded by its stage timeout.
+    """
+    merged = (CONTENT_GROWTH_MERGED_LLM if merged is None else merged) and bool(caption)
+    final_metrics = metrics or {}
+
+    seo = None
+    if caption and not merged:
+        seo = asyncio.ensure_future(_await_stage(aseo_analysis(caption), CONTENT_GROWTH_LLM_TIMEOUT, "SEO analysis", ""))
+
+    if screenshot:
+        log.info("📸 Extracting metrics from screenshot...")
+        img_metrics = await _await_stage(asyncio.to_thread(extract_metrics_from_image, screenshot),
+                                         CONTENT_GROWTH_OCR_TIMEOUT, "OCR", {})
+        final_metrics.update(img_metrics)
+
+    if not final_metrics:
+        final_metrics = {"likes": 0, "comments": 0, "shares": 0, "views": 0}
+
+    if merged:
+        result = await _await_stage(aanalyze_metrics_with_seo(final_metrics, caption),
+                                    CONTENT_GROWTH_LLM_TIMEOUT, "Metrics analysis", {})
+        seo_result = (result or {}).get("seo", "")
+    else:
+        result = await _await_stage(aanalyze_metrics(final_metrics), CONTENT_GROWTH_LLM_TIMEOUT,
+                                    "Metrics analysis", {})
+        seo_result = await seo if seo else ""
+
+    return _growth_report(final_metrics, result, seo_result, caption)
+
+
 # ✅ Wrap as LangChain Tool
-content_growth_tool = Tool(
-    name="ContentGrowthPro",
-    func=content_growth_advanced,
-    description="Offline content growth analysis using screenshots + caption."
-)
+content_growth_tool = registered_tool("content_growth", content_growth_advanced)
 
 print("✅ Content Growth Tool Ready!")
@@ -1,5 +1,5 @@
 import random
-from langchain.tools import Tool
+from tools import registered_tool
 
 def greet_user(user_input=None):
     greetings = [
@@ -9,8 +9,4 @@ def greet_user(user_input=None):
     ]
     return {"answer": random.choice(greetings)}
 
-greeting_tool = Tool(
-    name="Greeting",
-    func=greet_user,
-    description="Responds in a friendly but professional manner to greetings like hi/hello/good morning/afternoon/evening/night."
-)
+greeting_tool = registered_tool("greeting", greet_user)
@@ -1,52 +1,49 @@
-from langchain.tools import Tool
-from bs4 import BeautifulSoup
-import requests, fitz, tempfile, os
-from langchain.docstore.document import Document
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import Pinecone as LangchainPinecone
-from pinecone import Pinecone, ServerlessSpec
-
-# 🔑 Setup Pinecone + OpenAI
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+import os, hashlib, sqlite3, threading
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from core.vector_backend import INDEX_NAME, UPLOADS_NAMESPACE, get_vectorstore
+from core.embedding_cache import get_embeddings
+from core.chunking import iter_chunks
+from core.pdf_extract import iter_pdf_pages
+from core.http_fetch import fetch, get_validators, map_urls
+from core.html_extract import extract_text, read_capped
+from core.metrics import llm_metrics, log, timed, timed_iter
+
+# 🔑 Setup OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-INDEX_NAME = "pinecone-db"
-
-# 🧠 Initialize embeddings
-embeddings = OpenAIEmbeddings(model="text-embedding-3-large", openai_api_key=OPENAI_API_KEY)
-
-# ✅ Initialize Pinecone client
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
-# Create index if missing
-if INDEX_NAME not in pc.list_indexes().names():
-    print(f"🆕 Creating Pinecone index: {INDEX_NAME}")
-    pc.create_index(
-        name=INDEX_NAME,
-        dimension=3072,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-    )
 
 
-# Connect to index
-index = pc.Index(INDEX_NAME)
+def get_ingest_vectorstore():
+    """
+    Vector store for uploaded content, connected on first ingest rather than
+    at import (Pinecone creates the index if missing). Uploads go to
+    UPLOADS_NAMESPACE, so the retriever's knowledge base never serves one
+    creator's documents to another. Embeddings are shared with the RAG
+    pipeline and cached in memory + on disk.
+    """
+    embeddings = get_embeddings("text-embedding-3-large")
+    return get_vectorstore(embeddings, index_name=INDEX_NAME, create_if_missing=True, namespace=UPLOADS_NAMESPACE)
 
 
-# Create LangChain vectorstore wrapper
-vectorstore = LangchainPinecone(index, embeddings, text_key="text")
+def uploads_retriever(owner: str, k: int = 5):
+    """Retriever over the content one owner (session) ingested, for its direct route."""
+    return get_ingest_vectorstore().as_retriever(search_kwargs={"k": k, "filter": {"owner": owner}})
 
 
 # --------------------------
 # 1️⃣ Web Page Scraper
 # --------------------------
-def scrape_web_page(url: str) -> str:
+def html_to_text(content) -> str:
+    # lxml main-content extraction, falling back to all <p> text (HTML_EXTRACT_ENGINE)
+    return extract_text(content)
+
+
+def scrape_web_page(url: str, max_chars: int = None) -> str:
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-        paragraphs = soup.find_all("p")
-        text = " ".join([p.get_text() for p in paragraphs])
-        return text.strip()[:3000]
+        # Stream the body and stop at HTML_MAX_BYTES instead of downloading everything
+        with timed("scrape"):
+            response = fetch(url, conditional=False, stream=True)
+            return html_to_text(read_capped(response))[:max_chars]
     except Exception as e:
         return f"Error scraping {url}: {e}"
 
@@ -54,18 +51,12 @@ def scrape_web_page(url: str) -> str:
 # --------------------------
 # 2️⃣ PDF Reader
 # --------------------------
-def read_pdf_from_upload(file) -> str:
+# Pages are read from memory (no temp files) and large PDFs are split across
+# worker processes; see core/pdf_extract.py.
+def read_pdf_from_upload(file, max_chars: int = None) -> str:
     try:
-        if isinstance(file, str):
-            file_path = file
-        else:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                tmp.write(file.read())
-                file_path = tmp.name
-
-        doc = fitz.open(file_path)
-        text = "".join(page.get_text() for page in doc)
-        return text.strip()[:3000]
+        text = "".join(timed_iter(iter_pdf_pages(file), "pdf_parse"))
+        return text.strip()[:max_chars]
     except Exception as e:
         return f"Error reading PDF: {e}"
 
@@ -73,20 +64,189 @@ def read_pdf_from_upload(file) -> str:
 # --------------------------
 # 3️⃣ GPT Summarization
 # --------------------------
-summary_llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0,
-    openai_api_key=OPENAI_API_KEY
-)
+@lru_cache(maxsize=1)
+def get_summary_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0,
+        openai_api_key=OPENAI_API_KEY,
+        callbacks=[llm_metrics]
+    )
+
+SUMMARY_INPUT_CHARS = 3000
+
+
+def summarize_text(text: str) -> str:
+    try:
+        summary_prompt = (
+            f"Summarize the following text into 3–5 concise, actionable bullet points:\n\n{text[:SUMMARY_INPUT_CHARS]}"
+        )
+        return get_summary_llm().call_as_llm(summary_prompt)
+    except Exception:
+        return "⚠️ Failed to generate summary."
+
+
+# --------------------------
+# 4️⃣ Chunked, batched upserts
+# --------------------------
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "128"))
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "4"))
+INGEST_LEDGER_PATH = os.getenv("INGEST_LEDGER_PATH", os.path.join(".cache", "ingest_ledger.sqlite3"))
+
+
+def _source_key(source: str, owner: str = None) -> str:
+    return f"{owner}\n{source}" if owner else source
+
+
+def chunk_id(source: str, index: int, owner: str = None) -> str:
+    """Deterministic chunk id, so re-ingesting a source overwrites its chunks (per owner)."""
+    digest = hashlib.sha256(_source_key(source, owner).encode("utf-8")).hexdigest()[:16]
+    return f"{digest}-{index:06d}"
+
+
+class ChunkLedger:
+    """Number of chunks last stored per source, so a shorter re-ingest can delete the rest."""
+
+    def __init__(self, db_path: str = INGEST_LEDGER_PATH):
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS chunk_counts (source TEXT PRIMARY KEY, chunks INTEGER)")
+            self._db.commit()
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+            if self._db is None:
+                return 0
+            row = self._db.execute("SELECT chunks FROM chunk_counts WHERE source = ?", (key,)).fetchone()
+            return row[0] if row else 0
+
+    def put(self, key: str, chunks: int):
+        with self._lock:
+            self._memory[key] = chunks
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO chunk_counts (source, chunks) VALUES (?, ?)", (key, chunks))
+                self._db.commit()
+
+    def pop_owner(self, owner: str):
+        """Removes and returns [(source, chunks)] for every source `owner` ingested."""
+        if not owner:
+            return []
+        prefix = _source_key("", owner)
+        with self._lock:
+            found = {key: chunks for key, chunks in self._memory.items() if key.startswith(prefix)}
+            if self._db is not None:
+                where = "substr(source, 1, ?) = ?"
+                for key, chunks in self._db.execute(f"SELECT source, chunks FROM chunk_counts WHERE {where}",
+                                                    (len(prefix), prefix)):
+                    found.setdefault(key, chunks)
+                self._db.execute(f"DELETE FROM chunk_counts WHERE {where}", (len(prefix), prefix))
+                self._db.commit()
+            for key in found:
+                self._memory.pop(key, None)
+        return [(key[len(prefix):], chunks) for key, chunks in found.items()]
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_chunk_ledger() -> ChunkLedger:
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = ChunkLedger()
+        return _ledger
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def upsert_chunks(chunks, source: str, batch_size: int = INGEST_BATCH_SIZE,
+                  max_workers: int = INGEST_MAX_WORKERS, owner: str = None) -> int:
+    """
+    Embeds and upserts chunks in batches of `batch_size` on `max_workers` threads.
+    At most 2 × max_workers batches are in flight, so a long document never sits
+    in memory all at once. `owner` (a session id) tags the chunks so only that
+    session retrieves them. Chunks left over from a longer earlier version of
+    the source are deleted. Returns the number of chunks stored.
+    """
+    vectorstore = get_ingest_vectorstore()
+    tags = {"owner": owner} if owner else {}
+
+    def store(batch):
+        texts = [text for _, text in batch]
+        metadatas = [{"source": source, "chunk": index, **tags} for index, _ in batch]
+        ids = [chunk_id(source, index, owner) for index, _ in batch]
+        with timed("embed_upsert"):
+            vectorstore.add_texts(texts, metadatas=metadatas, ids=ids)
+        return len(batch)
+
+    stored = 0
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for batch in _batched(enumerate(chunks), batch_size):
+            if len(in_flight) >= 2 * max_workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                stored += sum(future.result() for future in done)
+            in_flight.add(pool.submit(store, batch))
+        for future in in_flight:
+            stored += future.result()
+
+    # Nothing stored means extraction failed: keep the previous version whole
+    if not stored:
+        return stored
+    # Ids are positional, so only the tail beyond the new count can be stale
+    ledger = get_chunk_ledger()
+    key = _source_key(source, owner)
+    previous = ledger.get(key)
+    if previous > stored:
+        stale = (chunk_id(source, index, owner) for index in range(stored, previous))
+        with timed("embed_upsert"):
+            for batch in _batched(stale, batch_size):
+                vectorstore.delete(ids=batch)
+    ledger.put(key, stored)
+    return stored
+
+
+def delete_uploads(owner: str) -> int:
+    """
+    Deletes every chunk `owner` ingested, and its fetch validators so that
+    ingesting the same URL again downloads it. Returns the number of chunks.
+    """
+    vectorstore = get_ingest_vectorstore()
+    deleted = 0
+    for source, chunks in get_chunk_ledger().pop_owner(owner):
+        for batch in _batched((chunk_id(source, index, owner) for index in range(chunks)), INGEST_BATCH_SIZE):
+            vectorstore.delete(ids=batch)
+        get_validators().forget(f"{owner} {source}")
+        deleted += chunks
+    return deleted
+
 
 # This is working!!
 # --------------------------
-# 4️⃣ Unified Ingest Function
+# 5️⃣ Unified Ingest Function
 # --------------------------
 def ingest_content(*args, **kwargs) -> str:
-    """Agent-safe ingestion: handles URL, PDF, and extra state argument."""
+    """Agent-safe ingestion: handles URL, PDF, and extra state argument (owner=<session id> tags the chunks)."""
 
     source = None
+    owner = kwargs.get("owner")
 
     # Handle flexible calling patterns
     if len(args) > 0:
@@ -110,44 +270,99 @@ def ingest_content(*args, **kwargs) -> str:
     if not source:
         return "⚠️ No valid source provided."
 
+    source_name = source if isinstance(source, str) else getattr(source, "filename", None) or getattr(source, "name", None) or str(source)
+
     # --------------------------
-    # Load content
+    # Load content as a stream of text segments
     # --------------------------
     if isinstance(source, str) and source.startswith("http"):
         content = scrape_web_page(source)
+        if not content or content.startswith("Error"):
+            return f"⚠️ Ingestion failed: {content}"
+        segments = iter([content])
     else:
-        content = read_pdf_from_upload(source)
+        segments = timed_iter(iter_pdf_pages(source), "pdf_parse")
+
+    # Keep the opening text for the summary while the rest streams through
+    head = []
+    head_chars = 0
 
-    if not content or content.startswith("Error"):
-        return f"⚠️ Ingestion failed: {content}"
+    def tee_head(stream):
+        nonlocal head_chars
+        for segment in stream:
+            if head_chars < SUMMARY_INPUT_CHARS:
+                head.append(segment)
+                head_chars += len(segment)
+            yield segment
 
     # --------------------------
-    # Summarize
+    # Chunk, embed and store in the vector index
     # --------------------------
     try:
-        summary_prompt = (
-            f"Summarize the following text into 3–5 concise, actionable bullet points:\n\n{content[:3000]}"
-        )
-        summary = summary_llm.call_as_llm(summary_prompt)
+        stored = upsert_chunks(iter_chunks(tee_head(segments)), source=str(source_name), owner=owner)
     except Exception as e:
-        summary = "⚠️ Failed to generate summary."
+        log.exception("❌ Failed to ingest content: %s", e)
+        return f"❌ Failed to ingest content: {e}"
+
+    if not stored:
+        return "⚠️ Ingestion failed: no text found."
 
     # --------------------------
-    # Store in Pinecone
+    # Summarize
     # --------------------------
-    doc = Document(page_content=content, metadata={"source": str(source), "summary": summary})
-    try:
-        vectorstore.add_documents([doc])
-        return (
-            f"✅ Content from {source} added to Pinecone index.\n"
-            f"📝 Summary: {summary}"
-        )
-    except Exception as e:
-        import traceback
-        print("\n❌ ERROR TRACEBACK STARTS HERE ❌")
-        traceback.print_exc()
-        print("❌ ERROR TRACEBACK ENDS HERE ❌\n")
-        return f"❌ Failed to ingest content: {e}"
+    summary = summarize_text("".join(head))
+    return (
+        f"✅ Content from {source_name} added to the vector index ({stored} chunks).\n"
+        f"📝 Summary: {summary}"
+    )
+
+
+# --------------------------
+# 6️⃣ Bulk URL Ingestion
+# --------------------------
+INGEST_URL_WORKERS = int(os.getenv("INGEST_URL_WORKERS", "16"))
+
+
+def _ingest_fetched_url(url: str, limiter, summarize: bool, owner: str = None) -> dict:
+    # Each owner keeps its own copy of a page, so the 304 shortcut is per owner too
+    validator_key = f"{owner} {url}" if owner else url
+    with timed("scrape"):
+        response = fetch(url, limiter=limiter, stream=True, validator_key=validator_key)
+        if response.status_code == 304:
+            response.close()
+            return {"url": url, "status": "unchanged", "chunks": 0}
+        text = html_to_text(read_capped(response))
+    if not text:
+        return {"url": url, "status": "empty", "chunks": 0}
+
+    # URLs already run in parallel, so each one upserts on a single thread
+    stored = upsert_chunks(iter_chunks([text]), source=url, max_workers=1, owner=owner)
+    get_validators().put(validator_key, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    result = {"url": url, "status": "ingested", "chunks": stored}
+    if summarize:
+        result["summary"] = summarize_text(text)
+    return result
+
+
+def ingest_urls(urls, max_workers: int = INGEST_URL_WORKERS, per_host: int = None, summarize: bool = False,
+                owner: str = None):
+    """
+    Fetches and ingests many URLs concurrently over the pooled HTTP session.
+    Yields one result dict per URL as soon as it finishes; pages that answer
+    304 Not Modified since their last ingest are reported as "unchanged".
+    `owner` is passed on to upsert_chunks().
+    """
+    if isinstance(urls, str):
+        urls = urls.split()
+    urls = [url.strip() for url in urls if url and url.strip().startswith("http")]
+    limit_kwargs = {"per_host": per_host} if per_host else {}
+    handler = lambda url, limiter: _ingest_fetched_url(url, limiter, summarize, owner)
+    for url, result, error in map_urls(urls, handler, max_workers=max_workers, **limit_kwargs):
+        if error is not None:
+            yield {"url": url, "status": "error", "chunks": 0, "error": str(error)}
+        else:
+            yield result
 
 
 print("✅ Ingested tools are ready!")
\ No newline at end of file
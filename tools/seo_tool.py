@@ -1,21 +1,36 @@
-from openai import OpenAI
-from langchain.tools import Tool
+from functools import lru_cache
+from tools import registered_tool
 from config.key_manager import OPENAI_API_KEY
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+@lru_cache(maxsize=1)
+def get_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
 
 def seo_analysis(content: str):
     if not content.strip():
         return "❌ Empty content."
     prompt = f"SEO analyze this content: {content}"
-    res = client.chat.completions.create(
+    res = get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}]
+    )
+    return res.choices[0].message.content
+
+async def aseo_analysis(content: str):
+    if not content.strip():
+        return "❌ Empty content."
+    prompt = f"SEO analyze this content: {content}"
+    res = await get_async_client().chat.completions.create(
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}]
     )
     return res.choices[0].message.content
 
-seo_tool = Tool(
-    name="AdvancedSEOAnalyzer",
-    func=seo_analysis,
-    description="Analyzes content for SEO and suggests improvements."
-)
+seo_tool = registered_tool("seo_tool", seo_analysis)
@@ -1,4 +1,4 @@
-from langchain.tools import Tool
+from tools import registered_tool
 
 def social_media_optimizer(content: str):
     hashtags = "#AI #ContentCreation #Growth"
@@ -13,8 +13,4 @@ def social_media_optimizer(content: str):
 # --------------------------
 #  Wrap as a LangChain tool
 # --------------------------
-social_tool = Tool(
-    name="SocialMediaOptimizer",
-    func=social_media_optimizer,
-    description="Optimizes content for different social platforms."
-)
+social_tool = registered_tool("social_tool", social_media_optimizer)
@@ -1,17 +1,24 @@
 import os
+import io
+import asyncio
 import tempfile
-import sounddevice as sd
-# import soundfile as sf
-from openai import OpenAI
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
 from langchain.tools import Tool  # if you're using LangChain for tool registration
+from core.metrics import in_context, log, timed
 
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# Initialize client
-client = OpenAI(api_key=OPENAI_API_KEY)
+
+# Initialize client on first use
+@lru_cache(maxsize=1)
+def get_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
 
 
 # 🎙️ Record audio locally (for local use only)
@@ -20,6 +27,10 @@ def record_audio(duration=5, fs=16000):
     Records audio from the user's microphone for 'duration' seconds.
     Returns a temporary WAV file path.
     """
+    # Audio devices only exist on local machines; import lazily so servers can load this module
+    import sounddevice as sd
+    import soundfile as sf
+
     print(f"🎙️ Recording for {duration} seconds...")
     audio = sd.rec(int(duration * fs), samplerate=fs, channels=1)
     sd.wait()
@@ -34,7 +45,7 @@ def speech_to_text_tool(duration=10):
     Records the user's voice locally and converts it to text using Whisper.
     """
     audio_path = record_audio(duration)
-    result = client.audio.transcriptions.create(
+    result = get_client().audio.transcriptions.create(
         file=open(audio_path, "rb"),
         model="whisper-1"
     )
@@ -43,18 +54,147 @@ def speech_to_text_tool(duration=10):
 
 
 # 🌐 Speech-to-text (web upload mode)
+# Short clips (browser mic) go to Whisper as-is. Long uploads are decoded with
+# pydub, cut into ~STT_SEGMENT_SECONDS pieces at the quietest pause near each
+# cut point, downmixed to 16 kHz mono and transcribed concurrently with the
+# shared client; the texts are stitched back in order. Anything over the API's
+# upload limit (STT_MAX_REQUEST_MB) is re-encoded even when it is short, and a
+# segment that still exceeds it is halved until it fits.
+STT_MODEL = os.getenv("STT_MODEL", "whisper-1")
+STT_SPLIT_MIN_MB = float(os.getenv("STT_SPLIT_MIN_MB", "4"))
+STT_SEGMENT_SECONDS = float(os.getenv("STT_SEGMENT_SECONDS", "300"))
+STT_SEGMENT_FORMAT = os.getenv("STT_SEGMENT_FORMAT", "mp3")
+STT_WORKERS = int(os.getenv("STT_WORKERS", "8"))
+# Whisper rejects files over 25 MB
+STT_MAX_REQUEST_MB = float(os.getenv("STT_MAX_REQUEST_MB", "24"))
+_SILENCE_SEARCH_MS = 30_000   # look for a pause this far either side of each cut point
+_MIN_SILENCE_MS = 400
+_SILENCE_DB_BELOW_AVERAGE = 16
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, STT_WORKERS), thread_name_prefix="stt")
+        return _pool
+
+
+def _cut_points(audio, segment_ms: int):
+    """Cut positions (ms) roughly every segment_ms, moved to the middle of the nearest pause."""
+    from pydub.silence import detect_silence
+
+    threshold = audio.dBFS - _SILENCE_DB_BELOW_AVERAGE
+    cuts, start = [], 0
+    while len(audio) - start > segment_ms * 1.5:
+        target = start + segment_ms
+        window_start = max(start + segment_ms // 2, target - _SILENCE_SEARCH_MS)
+        window = audio[window_start:target + _SILENCE_SEARCH_MS]
+        pauses = detect_silence(window, min_silence_len=_MIN_SILENCE_MS, silence_thresh=threshold, seek_step=10)
+        if pauses:
+            middles = [window_start + (begin + end) // 2 for begin, end in pauses]
+            cut = min(middles, key=lambda ms: abs(ms - target))
+        else:
+            cut = target
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+
+def _encode(audio, max_bytes: int):
+    """Encoded pieces of audio, halving any piece that is still over max_bytes."""
+    buf = io.BytesIO()
+    audio.export(buf, format=STT_SEGMENT_FORMAT)
+    data = buf.getvalue()
+    if len(data) <= max_bytes or len(audio) < 2000:
+        return [data]
+    middle = len(audio) // 2
+    return _encode(audio[:middle], max_bytes) + _encode(audio[middle:], max_bytes)
+
+
+def split_audio(audio_bytes: bytes, filename: str = "input.wav", segment_seconds: float = STT_SEGMENT_SECONDS,
+                max_bytes: int = int(STT_MAX_REQUEST_MB * 1024 * 1024)):
+    """
+    [(filename, bytes)] segments ready for Whisper, each at most `max_bytes`.
+    Uploads below STT_SPLIT_MIN_MB, or without pydub installed, come back as
+    one segment; short recordings within the limit are passed through as-is.
+    """
+    if len(audio_bytes) < min(STT_SPLIT_MIN_MB * 1024 * 1024, max_bytes):
+        return [(filename, audio_bytes)]
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        log.warning("⚠️ pydub not installed, transcribing long audio in one request.")
+        return [(filename, audio_bytes)]
+
+    fmt = os.path.splitext(filename)[1].lstrip(".").lower() or None
+    audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format=fmt)
+    segment_ms = int(segment_seconds * 1000)
+    short = len(audio) <= segment_ms * 1.5
+    if short and len(audio_bytes) <= max_bytes:
+        return [(filename, audio_bytes)]
+
+    # Downmixed and re-encoded; a short recording is only re-encoded, not cut
+    audio = audio.set_channels(1).set_frame_rate(16000)
+    bounds = [0] + ([] if short else _cut_points(audio, segment_ms)) + [len(audio)]
+    pieces = [data for start, end in zip(bounds, bounds[1:]) for data in _encode(audio[start:end], max_bytes)]
+    return [(f"segment-{i}.{STT_SEGMENT_FORMAT}", data) for i, data in enumerate(pieces)]
+
+
+def _transcribe_segment(segment) -> str:
+    with timed("stt", "transcribe"):
+        result = get_client().audio.transcriptions.create(file=segment, model=STT_MODEL)
+    return result.text.strip()
+
+
+def transcribe_audio_bytes(audio_bytes: bytes, filename: str = "input.wav") -> str:
+    """Transcribes an in-memory upload, splitting long recordings into concurrent segments."""
+    try:
+        with timed("stt", "split"):
+            segments = split_audio(audio_bytes, filename)
+        if len(segments) == 1:
+            return _transcribe_segment(segments[0])
+        return " ".join(text for text in _get_pool().map(in_context(_transcribe_segment), segments) if text)
+    except Exception as e:
+        log.error("❌ Error during transcription: %s", e)
+        raise
+
+
 def speech_to_text_tool_web(audio_path):
     """
     Converts an uploaded audio file (from the Flask frontend) to text using Whisper.
     """
+    with open(audio_path, "rb") as f:
+        return transcribe_audio_bytes(f.read(), os.path.basename(audio_path))
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+async def aspeech_to_text_web(audio_bytes: bytes, filename: str = "input.wav") -> str:
+    """
+    Async variant of transcribe_audio_bytes for the ASGI app: splitting runs on
+    a worker thread, the segments are awaited together (at most STT_WORKERS at a time).
+    """
+    slots = asyncio.Semaphore(max(1, STT_WORKERS))
+
+    async def transcribe(segment):
+        async with slots:
+            with timed("stt", "transcribe"):
+                result = await get_async_client().audio.transcriptions.create(file=segment, model=STT_MODEL)
+            return result.text.strip()
+
     try:
-        result = client.audio.transcriptions.create(
-            file=open(audio_path, "rb"),
-            model="whisper-1"
-        )
-        return result.text
+        with timed("stt", "split"):
+            segments = await asyncio.to_thread(split_audio, audio_bytes, filename)
+        texts = await asyncio.gather(*(transcribe(segment) for segment in segments))
+        return " ".join(text for text in texts if text)
     except Exception as e:
-        print(f"❌ Error during transcription: {e}")
+        log.error("❌ Error during transcription: %s", e)
         raise
 
 
@@ -1,15 +1,29 @@
-from langchain.tools import Tool
-from tavily import TavilyClient
+from functools import lru_cache
+from tools import registered_tool
 from config.key_manager import TAVILY_API_KEY
+from core.tool_cache import ToolCache, SEARCH_CACHE_TTL
 
-tavily = TavilyClient(api_key=TAVILY_API_KEY)
+_cache = ToolCache("tavily_search", ttl=SEARCH_CACHE_TTL)
 
+
+@lru_cache(maxsize=1)
+def get_tavily():
+    from tavily import TavilyClient
+    return TavilyClient(api_key=TAVILY_API_KEY)
+
+@lru_cache(maxsize=1)
+def get_async_tavily():
+    from tavily import AsyncTavilyClient
+    return AsyncTavilyClient(api_key=TAVILY_API_KEY)
+
+@_cache.wrap
 def search_tavily(query: str):
-    results = tavily.search(query, max_results=3)
+    results = get_tavily().search(query, max_results=3)
+    return [r["content"] for r in results["results"]]
+
+@_cache.wrap
+async def asearch_tavily(query: str):
+    results = await get_async_tavily().search(query, max_results=3)
     return [r["content"] for r in results["results"]]
 
-search_tool = Tool(
-    name="Google Search (Tavily)",
-    func=search_tavily,
-    description="Searches the web for relevant info when context is insufficient."
-)
+search_tool = registered_tool("tavily_search", search_tavily)
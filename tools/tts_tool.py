@@ -1,28 +1,181 @@
-import os, tempfile
-from openai import OpenAI
-from langchain.agents import Tool
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from tools import registered_tool
 from config.key_manager import OPENAI_API_KEY
+from core.audio_cache import AudioCache, audio_key
+from core.metrics import in_context, record, timed
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+TTS_MODEL = os.getenv("TTS_MODEL", "gpt-4o-mini-tts")
+TTS_VOICE = os.getenv("TTS_VOICE", "alloy")
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "400"))
+TTS_PIPELINE_DEPTH = int(os.getenv("TTS_PIPELINE_DEPTH", "3"))
+_STREAM_CHUNK = 8192
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
 
-def text_to_speech_live(text: str):
+_audio_cache = None
+_pool = None
+_setup_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+def get_audio_cache() -> AudioCache:
+    global _audio_cache
+    with _setup_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
+
+def _get_pool():
+    global _pool
+    with _setup_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, TTS_PIPELINE_DEPTH) * 4, thread_name_prefix="tts")
+        return _pool
+
+def split_sentences(text: str, max_chars: int = TTS_CHUNK_CHARS):
+    """
+    Chunks for pipelined synthesis: the first is a single sentence so audio
+    starts quickly, the rest pack whole sentences up to max_chars. Sentences
+    longer than max_chars are cut at the last space before the limit.
+    """
+    sentences = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+
+    chunks = sentences[:1]
+    for sentence in sentences[1:]:
+        if len(chunks) > 1 and len(chunks[-1]) + 1 + len(sentence) <= max_chars:
+            chunks[-1] += " " + sentence
+        else:
+            chunks.append(sentence)
+    return chunks
+
+def _speech_response(text: str, voice: str, model: str):
+    return get_client().audio.speech.with_streaming_response.create(
+        model=model,
+        voice=voice,
+        input=text,
+        response_format="mp3"
+    )
+
+def synthesize(text: str, voice: str = TTS_VOICE, model: str = TTS_MODEL) -> bytes:
+    """Whole clip for text, from the audio cache when it has been synthesised before."""
+    cache = get_audio_cache()
+    key = audio_key(text, voice, model)
+    audio = cache.get(key)
+    if audio is None:
+        with timed("tts", "synthesize"), _speech_response(text, voice, model) as response:
+            audio = response.read()
+        cache.put(key, audio)
+    return audio
+
+def _stream_chunk(text: str, voice: str, model: str):
+    """Yields provider bytes as they arrive and caches the finished clip."""
+    cache = get_audio_cache()
+    key = audio_key(text, voice, model)
+    audio = cache.get(key)
+    if audio is not None:
+        for i in range(0, len(audio), _STREAM_CHUNK):
+            yield audio[i:i + _STREAM_CHUNK]
+        return
+    parts = []
+    started = time.perf_counter()
+    with _speech_response(text, voice, model) as response:
+        for part in response.iter_bytes(_STREAM_CHUNK):
+            if not parts:
+                record("tts", "first_byte", time.perf_counter() - started)
+            parts.append(part)
+            yield part
+    cache.put(key, b"".join(parts))
+
+def text_to_speech_live(text: str, voice: str = TTS_VOICE, model: str = TTS_MODEL):
+    if not text.strip():
+        raise ValueError("❌ Empty text.")
+    return synthesize(text, voice, model)
+
+def text_to_speech_stream(text: str, voice: str = TTS_VOICE, model: str = TTS_MODEL):
+    """
+    Yields MP3 bytes for text as soon as they are available. A clip already in
+    the cache is served whole; otherwise the first sentence is passed straight
+    through from the provider while the next TTS_PIPELINE_DEPTH chunks are
+    synthesised in the background, and the joined clip is cached at the end.
+    """
+    if not text.strip():
+        raise ValueError("❌ Empty text.")
+    cache = get_audio_cache()
+    key = audio_key(text, voice, model)
+    audio = cache.get(key)
+    if audio is not None:
+        for i in range(0, len(audio), _STREAM_CHUNK):
+            yield audio[i:i + _STREAM_CHUNK]
+        return
+
+    chunks = split_sentences(text)
+    pool = _get_pool()
+    ahead = {}
+    parts = []
+
+    def prefetch(upto):
+        for i in range(1, min(upto, len(chunks))):
+            if i not in ahead:
+                ahead[i] = pool.submit(in_context(synthesize), chunks[i], voice, model)
+
+    try:
+        prefetch(1 + TTS_PIPELINE_DEPTH)
+        for part in _stream_chunk(chunks[0], voice, model):
+            parts.append(part)
+            yield part
+        for i in range(1, len(chunks)):
+            prefetch(i + 1 + TTS_PIPELINE_DEPTH)
+            clip = ahead.pop(i).result()
+            parts.append(clip)
+            for j in range(0, len(clip), _STREAM_CHUNK):
+                yield clip[j:j + _STREAM_CHUNK]
+    finally:
+        # Client went away: don't synthesise chunks nobody will hear
+        for future in ahead.values():
+            future.cancel()
+    if len(chunks) > 1:
+        cache.put(key, b"".join(parts))
+
+@lru_cache(maxsize=1)
+def get_async_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+async def atext_to_speech_live(text: str, voice: str = TTS_VOICE, model: str = TTS_MODEL) -> bytes:
+    """Async variant for the ASGI app; shares the audio cache with the sync path."""
     if not text.strip():
         raise ValueError("❌ Empty text.")
-    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as tmp_file:
-        tmp_path = tmp_file.name
-    with client.audio.speech.with_streaming_response.create(
-        model="gpt-4o-mini-tts",
-        voice="alloy",
-        input=text
-    ) as response:
-        response.stream_to_file(tmp_path)
-    with open(tmp_path, "rb") as f:
-        audio = f.read()
-    os.remove(tmp_path)
+    cache = get_audio_cache()
+    key = audio_key(text, voice, model)
+    audio = cache.get(key)
+    if audio is not None:
+        return audio
+    with timed("tts", "synthesize"):
+        async with get_async_client().audio.speech.with_streaming_response.create(
+            model=model,
+            voice=voice,
+            input=text,
+            response_format="mp3"
+        ) as response:
+            audio = await response.read()
+    cache.put(key, audio)
     return audio
 
-tts_tool = Tool(
-    name="Text-to-Speech",
-    func=text_to_speech_live,
-    description="Converts text output of the agent to natural speech using OpenAI TTS."
-)
+tts_tool = registered_tool("tts_tool", text_to_speech_live)